@@ -0,0 +1,807 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the KDE Connect MCP server
+
+Every benchmark runs offline against mock_kdeconnectd.py on a private
+dbus-daemon, so no phone or real kdeconnectd is needed.
+
+Usage:
+    python3 bench_mcp.py round-trips [--notifications 40]
+    python3 bench_mcp.py concurrency [--clients 16] [--devices 4] [--latency 50]
+    python3 bench_mcp.py detect [--players 2 4 8 16]
+    python3 bench_mcp.py proxy-pool [--calls 500]
+    python3 bench_mcp.py received-files [--files 100000]
+    python3 bench_mcp.py startup [--runs 5] [--max-ms 3000]
+    python3 bench_mcp.py tools [--calls 200] [--devices 2] [--latency 5] [--churn 100]
+    python3 bench_mcp.py http [--clients 64] [--calls 20] [--rate-limit 0]
+    python3 bench_mcp.py now-playing [--reads 500] [--latency 20] [--ttl 30]
+    python3 bench_mcp.py offline [--latency 5] [--timeout 2]
+    python3 bench_mcp.py dismiss [--notifications 10 50 200] [--latency 20]
+    python3 bench_mcp.py serialize [--records 1000 10000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append('/usr/lib/python3/dist-packages')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MOCK_DAEMON = os.path.join(HERE, "mock_kdeconnectd.py")
+SERVER = os.path.join(HERE, "mcp_server.py")
+
+
+class MockSession:
+    """Private dbus-daemon with mock_kdeconnectd.py registered on it"""
+
+    def __init__(self, devices: int = 1, players: int = 3, notifications: int = 40, latency: int = 0,
+                 churn: int = 0, drain: int = 0, offline: int = 0):
+        self.mock_args = [
+            "--devices", str(devices),
+            "--players", str(players),
+            "--notifications", str(notifications),
+            "--latency", str(latency),
+            "--churn", str(churn),
+            "--drain", str(drain),
+            "--offline", str(offline),
+        ]
+        self.bus_proc = None
+        self.mock_proc = None
+        self.address = ""
+
+    def __enter__(self):
+        self.bus_proc = subprocess.Popen(
+            ["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        self.address = self.bus_proc.stdout.readline().strip()
+        # Everything started from here on (including mcp_server imports) uses the private bus
+        os.environ["DBUS_SESSION_BUS_ADDRESS"] = self.address
+
+        self.mock_proc = subprocess.Popen(
+            [sys.executable, MOCK_DAEMON] + self.mock_args,
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        if self.mock_proc.stdout.readline().strip() != "ready":
+            self.__exit__(None, None, None)
+            raise RuntimeError("mock_kdeconnectd.py failed to start")
+        return self
+
+    def __exit__(self, *exc):
+        for proc in (self.mock_proc, self.bus_proc):
+            if proc and proc.poll() is None:
+                proc.terminate()
+                proc.wait(timeout=5)
+
+
+def mock_stats():
+    """Return the mock daemon's call counter interface"""
+    import dbus
+    bus = dbus.SessionBus()
+    obj = bus.get_object("org.kde.kdeconnect", "/modules/kdeconnect")
+    return dbus.Interface(obj, "org.kde.kdeconnect.mock")
+
+
+def count_calls(stats, fn) -> int:
+    """Run fn and return how many D-Bus method calls the mock daemon received"""
+    stats.ResetStats()
+    fn()
+    return sum(int(v) for v in stats.CallStats().values())
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+# ========== round-trips ==========
+
+def per_field_read(kdeconnect, path: str, interface: str, fields):
+    """Read properties one Get at a time, as the readers did before GetAll"""
+    import dbus
+    obj = kdeconnect.bus.get_object(kdeconnect.BUS_NAME, path)
+    props = dbus.Interface(obj, "org.freedesktop.DBus.Properties")
+    return {field: props.Get(interface, field) for field in fields}
+
+
+def bench_round_trips(args):
+    with MockSession(notifications=args.notifications):
+        from mcp_server import KDEConnectDBus
+
+        kdeconnect = KDEConnectDBus()
+        stats = mock_stats()
+        device_id = kdeconnect.list_devices()[0]
+        device_path = f"{kdeconnect.DEVICE_PATH_PREFIX}/{device_id}"
+
+        def per_field_notifications():
+            iface = kdeconnect._get_device_interface(device_id, "notifications")
+            for notif_id in iface.activeNotifications():
+                per_field_read(
+                    kdeconnect,
+                    f"{device_path}/notifications/{notif_id}",
+                    "org.kde.kdeconnect.device.notifications.notification",
+                    ["appName", "title", "text", "ticker", "dismissable", "hasIcon", "silent", "replyId"]
+                )
+
+        readers = [
+            (
+                "get_device_info",
+                lambda: per_field_read(kdeconnect, device_path, "org.kde.kdeconnect.device",
+                                       ["name", "type", "isPaired", "isReachable"]),
+                lambda: kdeconnect.get_device_info(device_id),
+            ),
+            (
+                "get_battery",
+                lambda: per_field_read(kdeconnect, f"{device_path}/battery",
+                                       "org.kde.kdeconnect.device.battery", ["charge", "isCharging"]),
+                lambda: kdeconnect.get_battery(device_id),
+            ),
+            (
+                "get_now_playing",
+                lambda: per_field_read(kdeconnect, f"{device_path}/mprisremote",
+                                       "org.kde.kdeconnect.device.mprisremote",
+                                       ["playerList", "player", "title", "artist", "album",
+                                        "isPlaying", "position", "length", "volume"]),
+                lambda: kdeconnect.get_now_playing(device_id),
+            ),
+            (
+                f"get_notifications ({args.notifications})",
+                per_field_notifications,
+                lambda: kdeconnect.get_notifications(device_id),
+            ),
+        ]
+
+        print(f"{'reader':<28} {'per-field':>10} {'GetAll':>8} {'saved':>8}")
+        for name, per_field, bulk in readers:
+            before = count_calls(stats, per_field)
+            after = count_calls(stats, bulk)
+            print(f"{name:<28} {before:>10} {after:>8} {before - after:>8}")
+
+
+# ========== concurrency ==========
+
+async def run_clients(mcp, tool: str, device_ids, clients: int, calls: int):
+    """Drive `clients` in-memory MCP clients at once, each making `calls` tool calls"""
+    from fastmcp import Client
+
+    latencies = []
+
+    async def client_loop(index: int):
+        device_id = device_ids[index % len(device_ids)]
+        async with Client(mcp) as client:
+            for _ in range(calls):
+                start = time.perf_counter()
+                await client.call_tool(tool, {"device_id": device_id})
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(i) for i in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+def bench_concurrency(args):
+    with MockSession(devices=args.devices, latency=args.latency):
+        import mcp_server
+
+        device_ids = mcp_server.kdeconnect.list_devices()
+        # Measure the D-Bus path, not response cache hits
+        mcp_server.response_cache.enabled = False
+        print(f"{args.clients} clients x {args.calls} {args.tool} calls, "
+              f"{args.devices} devices, {args.latency} ms mock latency")
+        print(f"{'workers':<10} {'p50 ms':>8} {'p99 ms':>8} {'calls/s':>9}")
+        # workers=1 reproduces the old behaviour where every call queued behind the last
+        for workers in (1, args.workers):
+            mcp_server.async_kdeconnect = mcp_server.AsyncKDEConnectDBus(
+                mcp_server.kdeconnect, max_workers=workers
+            )
+            latencies, elapsed = asyncio.run(
+                run_clients(mcp_server.mcp, args.tool, device_ids, args.clients, args.calls)
+            )
+            print(f"{workers:<10} {percentile(latencies, 50) * 1000:>8.1f} "
+                  f"{percentile(latencies, 99) * 1000:>8.1f} {len(latencies) / elapsed:>9.1f}")
+
+
+# ========== detect ==========
+
+def bench_detect(args):
+    print(f"{'players':<8} {'sweep ms':>9} {'passive ms':>11} {'sweep Sets':>11} {'passive Sets':>13}")
+    for players in args.players:
+        with MockSession(players=players, latency=args.latency):
+            from mcp_server import KDEConnectDBus
+
+            kdeconnect = KDEConnectDBus()
+            stats = mock_stats()
+            device_id = kdeconnect.list_devices()[0]
+
+            row = []
+            for mode in ("sweep", "passive"):
+                stats.ResetStats()
+                start = time.perf_counter()
+                kdeconnect.detect_active_player(device_id, mode)
+                row.append((time.perf_counter() - start) * 1000)
+                row.append(int(stats.CallStats().get("Properties.Set", 0)))
+            print(f"{players:<8} {row[0]:>9.1f} {row[2]:>11.1f} {row[1]:>11} {row[3]:>13}")
+
+
+# ========== proxy-pool ==========
+
+def bench_proxy_pool(args):
+    with MockSession():
+        import dbus
+        from mcp_server import KDEConnectDBus
+
+        kdeconnect = KDEConnectDBus()
+        stats = mock_stats()
+        device_id = kdeconnect.list_devices()[0]
+        path = f"{kdeconnect.DEVICE_PATH_PREFIX}/{device_id}/battery"
+
+        def unpooled():
+            # What every reader did before the pool: fresh, introspecting proxy per call
+            obj = kdeconnect.bus.get_object(kdeconnect.BUS_NAME, path)
+            dbus.Interface(obj, "org.freedesktop.DBus.Properties").GetAll(
+                "org.kde.kdeconnect.device.battery"
+            )
+
+        def pooled():
+            kdeconnect.get_battery(device_id)
+
+        print(f"{args.calls} get_battery calls")
+        print(f"{'variant':<10} {'us/call':>9} {'D-Bus calls/call':>17}")
+        for name, fn in (("no pool", unpooled), ("pool", pooled)):
+            fn()  # warm up
+            stats.ResetStats()
+            start = time.perf_counter()
+            for _ in range(args.calls):
+                fn()
+            elapsed = time.perf_counter() - start
+            calls = sum(int(v) for v in stats.CallStats().values())
+            print(f"{name:<10} {elapsed / args.calls * 1e6:>9.1f} {calls / args.calls:>17.2f}")
+
+
+# ========== received-files ==========
+
+def full_scan(directory: str, limit: int):
+    """list_received_files before the catalogue: listdir, stat everything, sort, slice"""
+    files = []
+    for filename in os.listdir(directory):
+        filepath = os.path.join(directory, filename)
+        if os.path.isfile(filepath):
+            stat = os.stat(filepath)
+            files.append({
+                "name": filename,
+                "path": filepath,
+                "size": stat.st_size,
+                "modified": time.ctime(stat.st_mtime),
+                "modified_timestamp": stat.st_mtime
+            })
+    files.sort(key=lambda x: x["modified_timestamp"], reverse=True)
+    return files[:limit]
+
+
+def timed(fn, repeat: int) -> float:
+    """Average wall time of fn in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench_received_files(args):
+    with tempfile.TemporaryDirectory() as directory:
+        from mcp_server import ReceivedFilesCatalogue
+
+        print(f"creating {args.files} files in {directory} ...")
+        now = time.time()
+        for i in range(args.files):
+            path = os.path.join(directory, f"IMG_{i:06d}.{'jpg' if i % 3 else 'pdf'}")
+            with open(path, "wb") as f:
+                f.write(b"x" * (i % 4096))
+            mtime = now - random.uniform(0, 365 * 86400)
+            os.utime(path, (mtime, mtime))
+
+        catalogue = ReceivedFilesCatalogue(directory)
+        cold = timed(lambda: ReceivedFilesCatalogue(directory).query(args.limit), 1)
+        catalogue.query(args.limit)
+        week_ago = now - 7 * 86400
+
+        print(f"{'query':<34} {'ms':>9}")
+        print(f"{'full scan (before), top ' + str(args.limit):<34} {timed(lambda: full_scan(directory, args.limit), 3):>9.1f}")
+        print(f"{'catalogue cold build':<34} {cold:>9.1f}")
+        print(f"{'catalogue warm, top ' + str(args.limit):<34} {timed(lambda: catalogue.query(args.limit), 100):>9.3f}")
+        print(f"{'catalogue warm, *.pdf':<34} "
+              f"{timed(lambda: catalogue.query(args.limit, pattern='*.pdf'), 100):>9.3f}")
+        print(f"{'catalogue warm, last 7 days >1KiB':<34} "
+              f"{timed(lambda: catalogue.query(args.limit, min_size=1024, modified_after=week_ago), 100):>9.3f}")
+
+        with open(os.path.join(directory, "new_file.txt"), "w") as f:
+            f.write("new")
+        print(f"{'catalogue after one new file':<34} {timed(lambda: catalogue.query(args.limit), 1):>9.1f}")
+
+
+# ========== startup ==========
+
+def rpc(proc, method: str, params: dict = None, request_id: int = None):
+    """Write one JSON-RPC message to the server and, for requests, read the reply"""
+    message = {"jsonrpc": "2.0", "method": method}
+    if params is not None:
+        message["params"] = params
+    if request_id is not None:
+        message["id"] = request_id
+    proc.stdin.write(json.dumps(message) + "\n")
+    proc.stdin.flush()
+    if request_id is None:
+        return None
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError(f"server exited while waiting for {method}")
+        response = json.loads(line)
+        # Skip server notifications (log messages, progress) sent in between
+        if response.get("id") == request_id:
+            break
+    if "error" in response:
+        raise RuntimeError(f"{method} failed: {response['error']}")
+    return response
+
+
+def bench_startup(args):
+    # A bus address that cannot be connected to: startup must not need D-Bus at all
+    env = dict(os.environ, DBUS_SESSION_BUS_ADDRESS="unix:path=/nonexistent/kdeconnect-mcp-bench")
+    init_ms, list_ms = [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, SERVER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=env
+        )
+        try:
+            rpc(proc, "initialize", {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "bench", "version": "1.0.0"}
+            }, request_id=1)
+            init_ms.append((time.perf_counter() - start) * 1000)
+            rpc(proc, "notifications/initialized")
+            tools = rpc(proc, "tools/list", {}, request_id=2)["result"]["tools"]
+            list_ms.append((time.perf_counter() - start) * 1000)
+        finally:
+            proc.kill()
+            proc.wait()
+
+    print(f"{args.runs} cold starts, {len(tools)} tools, no session bus available")
+    print(f"{'response':<12} {'p50 ms':>8} {'max ms':>8}")
+    print(f"{'initialize':<12} {percentile(init_ms, 50):>8.1f} {max(init_ms):>8.1f}")
+    print(f"{'tools/list':<12} {percentile(list_ms, 50):>8.1f} {max(list_ms):>8.1f}")
+    if args.max_ms and percentile(init_ms, 50) > args.max_ms:
+        print(f"FAIL: median time to initialize exceeds {args.max_ms} ms")
+        sys.exit(1)
+
+
+# ========== tools ==========
+
+# Tools measured by default: every read-only tool that only needs a device id
+DEFAULT_TOOLS = [
+    "list_devices", "get_battery", "get_now_playing", "get_media_players",
+    "get_notifications", "detect_active_player",
+]
+
+
+def start_server(env: dict = None) -> subprocess.Popen:
+    """Start mcp_server.py over stdio and complete the MCP handshake"""
+    proc = subprocess.Popen(
+        [sys.executable, SERVER],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        env=env
+    )
+    rpc(proc, "initialize", {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {},
+        "clientInfo": {"name": "bench", "version": "1.0.0"}
+    }, request_id=0)
+    rpc(proc, "notifications/initialized")
+    return proc
+
+
+def tool_result(response: dict):
+    """Decode a tools/call response into the tool's return value"""
+    result = response["result"]
+    if result.get("isError"):
+        raise RuntimeError(result["content"][0]["text"])
+    if "structuredContent" in result:
+        return result["structuredContent"]
+    return json.loads(result["content"][0]["text"])
+
+
+def bench_tools(args):
+    with MockSession(devices=args.devices, players=args.players, notifications=args.notifications,
+                     latency=args.latency, churn=args.churn):
+        proc = start_server(dict(os.environ, KDECONNECT_MCP_RESPONSE_CACHE="0"))
+        request_id = 0
+        try:
+            def call(tool: str, arguments: dict):
+                nonlocal request_id
+                request_id += 1
+                return rpc(proc, "tools/call", {"name": tool, "arguments": arguments}, request_id=request_id)
+
+            # The first call also pays for the D-Bus connection, keep it out of the numbers
+            device_ids = [d["id"] for d in tool_result(call("list_devices", {}))["devices"]]
+
+            print(f"one stdio session, {args.calls} calls per tool, {args.devices} devices, "
+                  f"{args.players} players, {args.notifications} notifications, "
+                  f"{args.latency} ms mock latency, churn every {args.churn or '-'} ms")
+            print(f"{'tool':<22} {'calls/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for tool in args.tools:
+                latencies, errors = [], 0
+                start = time.perf_counter()
+                for i in range(args.calls):
+                    arguments = {} if tool == "list_devices" else {"device_id": device_ids[i % len(device_ids)]}
+                    sent = time.perf_counter()
+                    try:
+                        tool_result(call(tool, arguments))
+                    except RuntimeError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - sent)
+                elapsed = time.perf_counter() - start
+                print(f"{tool:<22} {len(latencies) / elapsed:>9.1f} "
+                      f"{percentile(latencies, 50) * 1000:>8.2f} {percentile(latencies, 95) * 1000:>8.2f} "
+                      f"{percentile(latencies, 99) * 1000:>8.2f} {errors:>7}")
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+# ========== now-playing ==========
+
+def bench_now_playing(args):
+    with MockSession(players=1, latency=args.latency):
+        import mcp_server
+
+        kdeconnect = mcp_server.kdeconnect
+        cache = mcp_server.now_playing
+        cache.ttl = args.ttl
+        stats = mock_stats()
+        device_id = kdeconnect.list_devices()[0]
+
+        direct_ms, cached_ms, errors = [], [], []
+        stats.ResetStats()
+        direct_calls = cached_calls = 0
+        for i in range(args.reads):
+            if args.toggle_every and i and i % args.toggle_every == 0:
+                # Pause/resume or seek mid-run: the signal must make the cache re-read
+                if i % (2 * args.toggle_every):
+                    kdeconnect.media_control(device_id, "PlayPause")
+                else:
+                    kdeconnect._get_properties(device_id, "mprisremote").Set(
+                        mcp_server.MPRIS_IFACE, "position", dbus_int(i * 100), signature="ssv"
+                    )
+                time.sleep(0.05)  # let the change signal arrive
+
+            before = sum(int(v) for v in stats.CallStats().values())
+            start = time.perf_counter()
+            interpolated = cache.get(device_id)
+            cached_ms.append((time.perf_counter() - start) * 1000)
+            middle = sum(int(v) for v in stats.CallStats().values())
+            start = time.perf_counter()
+            direct = kdeconnect.get_now_playing(device_id)
+            direct_ms.append((time.perf_counter() - start) * 1000)
+            after = sum(int(v) for v in stats.CallStats().values())
+            cached_calls += middle - before
+            direct_calls += after - middle
+            # While playing, the direct read sampled the position about half its round trip later
+            drift = direct_ms[-1] / 2 if direct["is_playing"] else 0
+            errors.append(abs(interpolated["position"] + drift - direct["position"]))
+            time.sleep(args.interval / 1000)
+
+        print(f"{args.reads} reads every {args.interval} ms, {args.latency} ms mock latency, "
+              f"ttl {args.ttl} s, pause/seek every {args.toggle_every or '-'} reads")
+        print(f"{'read':<14} {'p50 ms':>8} {'p99 ms':>8} {'D-Bus calls/read':>17}")
+        print(f"{'direct':<14} {percentile(direct_ms, 50):>8.2f} {percentile(direct_ms, 99):>8.2f} "
+              f"{direct_calls / args.reads:>17.2f}")
+        print(f"{'interpolated':<14} {percentile(cached_ms, 50):>8.2f} {percentile(cached_ms, 99):>8.2f} "
+              f"{cached_calls / args.reads:>17.2f}")
+        print(f"position error ms: p50 {percentile(errors, 50):.0f}, p99 {percentile(errors, 99):.0f}, "
+              f"max {max(errors):.0f}")
+
+
+# ========== offline ==========
+
+def bench_offline(args):
+    with MockSession(devices=2, latency=args.latency, offline=1):
+        import mcp_server
+
+        kdeconnect = mcp_server.kdeconnect
+        stats = mock_stats()
+        online_id, offline_id = kdeconnect.list_devices(reachable_only=False, paired_only=False)
+        # Connecting seeds the device cache in the background
+        for _ in range(500):
+            if mcp_server.device_cache.reachable(offline_id) is not None:
+                break
+            time.sleep(0.01)
+
+        def ping(device_id: str):
+            start = time.perf_counter()
+            try:
+                kdeconnect.send_ping(device_id, "bench")
+                outcome = "ok"
+            except Exception as e:
+                outcome = getattr(e, "reason", None) or type(e).__name__
+            return (time.perf_counter() - start) * 1000, outcome
+
+        print(f"send_ping, {args.latency} ms mock latency, D-Bus timeout {args.timeout} s when ungated")
+        print(f"{'case':<34} {'ms':>9}  outcome")
+        rows = [("reachable device", ping(online_id)), ("unreachable, gated", ping(offline_id))]
+
+        gate, mcp_server.scheduler.reachability = mcp_server.scheduler.reachability, None
+        token = mcp_server.dbus_timeout.set(args.timeout)
+        rows.append(("unreachable, ungated", ping(offline_id)))
+        mcp_server.dbus_timeout.reset(token)
+        mcp_server.scheduler.reachability = gate
+
+        stats.SetReachable(offline_id, True)
+        time.sleep(0.1)  # let reachableChanged arrive
+        rows.append(("after reachableChanged(true)", ping(offline_id)))
+        stats.SetReachable(offline_id, False)
+        time.sleep(0.1)
+        rows.append(("after reachableChanged(false)", ping(offline_id)))
+        # Past max_age the gate stays on while a resync runs in the background
+        mcp_server.device_cache.max_age = 0
+        rows.append(("cache past max_age", ping(offline_id)))
+        for name, (ms, outcome) in rows:
+            print(f"{name:<34} {ms:>9.2f}  {outcome}")
+
+
+# ========== dismiss ==========
+
+def bench_dismiss(args):
+    with MockSession(notifications=2 * sum(args.notifications), latency=args.latency):
+        import mcp_server
+
+        kdeconnect = mcp_server.kdeconnect.connect()
+        device_id = kdeconnect.list_devices()[0]
+        ids = [str(i) for i in kdeconnect._get_device_interface(device_id, "notifications").activeNotifications()]
+
+        print(f"dismissing notifications, {args.latency} ms mock latency")
+        print(f"{'notifications':>13} {'one call each ms':>17} {'pipelined ms':>13}")
+        for count in args.notifications:
+            sequential, ids = ids[:count], ids[count:]
+            start = time.perf_counter()
+            for notif_id in sequential:
+                kdeconnect.proxies.interface(
+                    f"{kdeconnect.DEVICE_PATH_PREFIX}/{device_id}/notifications/{notif_id}",
+                    "org.kde.kdeconnect.device.notifications.notification"
+                ).dismiss()
+            one_each = (time.perf_counter() - start) * 1000
+
+            pipelined, ids = ids[:count], ids[count:]
+            start = time.perf_counter()
+            errors = kdeconnect.send_notification_actions(device_id, [("dismiss", i) for i in pipelined])
+            elapsed = (time.perf_counter() - start) * 1000
+            failed = sum(1 for e in errors if e is not None)
+            print(f"{count:>13} {one_each:>17.1f} {elapsed:>13.1f}" + (f"  ({failed} failed)" if failed else ""))
+
+
+def dbus_int(value: int):
+    import dbus
+    return dbus.Int32(value)
+
+
+# ========== serialize ==========
+
+def bench_serialize(args):
+    from mcp_server import Notification, ReceivedFile, _jsonable
+
+    def notification_fields(i):
+        return dict(id=f"mock{i}", app_name=f"App {i % 5}", title=f"Notification {i}",
+                    text=f"Body of notification {i}", ticker=f"App {i % 5}: Notification {i}",
+                    dismissable=True, has_icon=bool(i % 3), silent=False,
+                    reply_id=f"reply-{i}" if i % 2 else "", icon_path="")
+
+    def file_fields(i):
+        return dict(name=f"IMG_{i:06d}.jpg", path=f"/home/user/Downloads/IMG_{i:06d}.jpg", size=i * 37,
+                    modified=time.ctime(1.7e9 + i), modified_timestamp=1.7e9 + i)
+
+    variants = [
+        ("dicts, json indent=2 (before)", dict, lambda obj: json.dumps(obj, indent=2)),
+        ("records, json compact", None, lambda obj: json.dumps(obj, separators=(",", ":"), default=_jsonable)),
+    ]
+    try:
+        import orjson
+        variants.append(("records, orjson", None, lambda obj: orjson.dumps(obj, default=_jsonable).decode()))
+    except ImportError:
+        pass
+    print(f"mcp_server.dumps backend: {'orjson' if len(variants) == 3 else 'stdlib json (orjson not installed)'}")
+
+    print(f"{'records':>8} {'payload':<14} {'variant':<30} {'build ms':>9} {'dump ms':>9} {'KiB':>8}")
+    for count in args.records:
+        for payload, cls, fields in (("notifications", Notification, notification_fields),
+                                     ("files", ReceivedFile, file_fields)):
+            for name, factory, serialize in variants:
+                make = factory or cls
+                build = timed(lambda: [make(**fields(i)) for i in range(count)], args.repeat)
+                items = [make(**fields(i)) for i in range(count)]
+                result = {payload: items, "count": count}
+                dump = timed(lambda: serialize(result), args.repeat)
+                size = len(serialize(result).encode()) / 1024
+                print(f"{count:>8} {payload:<14} {name:<30} {build:>9.2f} {dump:>9.2f} {size:>8.0f}")
+
+
+# ========== http ==========
+
+def free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_http_clients(url: str, tool: str, device_ids, clients: int, calls: int):
+    """Open `clients` streamable HTTP sessions at once, each making `calls` tool calls"""
+    from fastmcp import Client
+
+    latencies, errors = [], []
+
+    async def client_loop(index: int):
+        device_id = device_ids[index % len(device_ids)]
+        async with Client(url) as client:
+            for _ in range(calls):
+                start = time.perf_counter()
+                try:
+                    await client.call_tool(tool, {"device_id": device_id})
+                    latencies.append(time.perf_counter() - start)
+                except Exception as e:
+                    errors.append(type(e).__name__)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(i) for i in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def bench_http(args):
+    with MockSession(devices=args.devices, latency=args.latency):
+        port = free_port()
+        command = [sys.executable, SERVER, "--transport", "http", "--port", str(port),
+                   "--workers", str(args.workers), "--rate-limit", str(args.rate_limit)]
+        proc = subprocess.Popen(command, stderr=subprocess.DEVNULL,
+                                env=dict(os.environ, KDECONNECT_MCP_RESPONSE_CACHE="0"))
+        url = f"http://127.0.0.1:{port}/mcp"
+        try:
+            import urllib.request
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(url, timeout=1)
+                except urllib.error.HTTPError:
+                    break  # Listening: a bare GET without a session is rejected
+                except OSError:
+                    time.sleep(0.1)
+
+            from fastmcp import Client
+
+            async def devices():
+                async with Client(url) as client:
+                    return (await client.call_tool("list_devices", {})).structured_content["devices"]
+
+            device_ids = [d["id"] for d in asyncio.run(devices())]
+            print(f"{args.clients} HTTP clients x {args.calls} {args.tool} calls against one server, "
+                  f"{args.devices} devices, {args.latency} ms mock latency, "
+                  f"rate limit {args.rate_limit or '-'} req/s per client")
+            latencies, errors, elapsed = asyncio.run(
+                run_http_clients(url, args.tool, device_ids, args.clients, args.calls)
+            )
+            print(f"{'ok':>6} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8} {'calls/s':>9}")
+            print(f"{len(latencies):>6} {len(errors):>7} {percentile(latencies or [0], 50) * 1000:>8.1f} "
+                  f"{percentile(latencies or [0], 99) * 1000:>8.1f} {len(latencies) / elapsed:>9.1f}")
+
+            # Graceful shutdown: SIGTERM must let the server exit on its own
+            start = time.perf_counter()
+            proc.terminate()
+            code = proc.wait(timeout=30)
+            print(f"shutdown after SIGTERM: exit code {code} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KDE Connect MCP server benchmarks")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p = sub.add_parser("round-trips", help="D-Bus calls per reader, per-field Get vs GetAll")
+    p.add_argument("--notifications", type=int, default=40)
+    p.set_defaults(func=bench_round_trips)
+
+    p = sub.add_parser("concurrency", help="p50/p99 tool latency with N concurrent MCP clients")
+    p.add_argument("--tool", default="get_battery")
+    p.add_argument("--clients", type=int, default=16)
+    p.add_argument("--calls", type=int, default=20, help="Calls per client")
+    p.add_argument("--devices", type=int, default=4)
+    p.add_argument("--latency", type=int, default=50, help="Mock reply delay in milliseconds")
+    p.add_argument("--workers", type=int, default=16, help="AsyncKDEConnectDBus worker threads")
+    p.set_defaults(func=bench_concurrency)
+
+    p = sub.add_parser("detect", help="detect_active_player: player sweep vs passive state cache")
+    p.add_argument("--players", type=int, nargs="+", default=[2, 4, 8, 16])
+    p.add_argument("--latency", type=int, default=5, help="Mock reply delay in milliseconds")
+    p.set_defaults(func=bench_detect)
+
+    p = sub.add_parser("proxy-pool", help="Repeated get_battery with and without the proxy pool")
+    p.add_argument("--calls", type=int, default=500)
+    p.set_defaults(func=bench_proxy_pool)
+
+    p = sub.add_parser("received-files", help="list_received_files on a synthetic download directory")
+    p.add_argument("--files", type=int, default=100000)
+    p.add_argument("--limit", type=int, default=10)
+    p.set_defaults(func=bench_received_files)
+
+    p = sub.add_parser("startup", help="Time to first response over stdio, without D-Bus")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--max-ms", type=float, default=0, help="Exit non-zero if median initialize exceeds this")
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("tools", help="Per-tool throughput and p50/p95/p99 over one stdio session")
+    p.add_argument("--tools", nargs="+", default=DEFAULT_TOOLS)
+    p.add_argument("--calls", type=int, default=200, help="Calls per tool")
+    p.add_argument("--devices", type=int, default=2)
+    p.add_argument("--players", type=int, default=3)
+    p.add_argument("--notifications", type=int, default=40)
+    p.add_argument("--latency", type=int, default=5, help="Mock reply delay in milliseconds")
+    p.add_argument("--churn", type=int, default=0,
+                   help="Mock replaces one notification per device every N milliseconds")
+    p.set_defaults(func=bench_tools)
+
+    p = sub.add_parser("now-playing", help="Interpolated vs direct now-playing reads: latency and accuracy")
+    p.add_argument("--reads", type=int, default=500)
+    p.add_argument("--interval", type=int, default=10, help="Milliseconds between reads")
+    p.add_argument("--latency", type=int, default=20, help="Mock reply delay in milliseconds")
+    p.add_argument("--ttl", type=float, default=30.0, help="NowPlayingCache ttl in seconds")
+    p.add_argument("--toggle-every", type=int, default=100,
+                   help="Alternate PlayPause and a seek every N reads (0 = never)")
+    p.set_defaults(func=bench_now_playing)
+
+    p = sub.add_parser("offline", help="Calls to an unreachable device: reachability gate vs D-Bus timeout")
+    p.add_argument("--latency", type=int, default=5, help="Mock reply latency in ms")
+    p.add_argument("--timeout", type=float, default=2.0, help="D-Bus timeout for the ungated call in seconds")
+    p.set_defaults(func=bench_offline)
+
+    p = sub.add_parser("dismiss", help="dismiss_notifications: one blocking call per notification vs pipelined")
+    p.add_argument("--notifications", type=int, nargs="+", default=[10, 50, 200])
+    p.add_argument("--latency", type=int, default=20, help="Mock reply latency in ms")
+    p.set_defaults(func=bench_dismiss)
+
+    p = sub.add_parser("serialize", help="Cost of building and serializing large tool results")
+    p.add_argument("--records", type=int, nargs="+", default=[1000, 10000])
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_serialize)
+
+    p = sub.add_parser("http", help="Many concurrent clients against one streamable HTTP server")
+    p.add_argument("--tool", default="get_battery")
+    p.add_argument("--clients", type=int, default=64)
+    p.add_argument("--calls", type=int, default=20, help="Calls per client")
+    p.add_argument("--devices", type=int, default=4)
+    p.add_argument("--latency", type=int, default=20, help="Mock reply delay in milliseconds")
+    p.add_argument("--workers", type=int, default=32, help="Server D-Bus worker threads")
+    p.add_argument("--rate-limit", type=float, default=0, help="Server per-client rate limit, req/s")
+    p.set_defaults(func=bench_http)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
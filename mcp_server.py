@@ -6,106 +6,1472 @@ Provides integration with KDE Connect devices through Model Context Protocol
 
 import sys
 import os
+import array
+import asyncio
+import base64
+import bisect
+import contextvars
+import copy
+import fnmatch
+import functools
+import glob
+import hashlib
+import inspect
+import io
+import json
+import mmap
+import pathlib
+import re
+import struct
+import subprocess
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 
 # Import FastMCP first, before adding system paths
-from typing import Any, Dict, List, Literal
-from pydantic import BaseModel, Field
-from fastmcp import FastMCP
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from pydantic import AnyUrl, BaseModel, Field
+from fastmcp import FastMCP, Context, Client
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import Middleware
+from mcp.types import ImageContent
 
 # Add system site-packages for dbus-python after FastMCP import
 sys.path.append('/usr/lib/python3/dist-packages')
 import dbus
-from dbus.mainloop.glib import DBusGMainLoop
 
+# kdeconnectd object paths and interfaces
+BUS_NAME = "org.kde.kdeconnect"
+DEVICE_PATH_PREFIX = "/modules/kdeconnect/devices"
+PROPERTIES_IFACE = "org.freedesktop.DBus.Properties"
+DAEMON_IFACE = "org.kde.kdeconnect.daemon"
+DEVICE_IFACE = "org.kde.kdeconnect.device"
+BATTERY_IFACE = "org.kde.kdeconnect.device.battery"
+MPRIS_IFACE = "org.kde.kdeconnect.device.mprisremote"
+NOTIFICATIONS_IFACE = "org.kde.kdeconnect.device.notifications"
+NOTIFICATION_IFACE = "org.kde.kdeconnect.device.notifications.notification"
 
-# Initialize D-Bus
-DBusGMainLoop(set_as_default=True)
+
+def device_id_from_path(path: str, suffix: str = "") -> str:
+    """Device id of a device object path ending in suffix, or "" for any other path"""
+    prefix = DEVICE_PATH_PREFIX + "/"
+    if not path or not path.startswith(prefix) or not path.endswith(suffix):
+        return ""
+    device_id = path[len(prefix):len(path) - len(suffix)]
+    return "" if "/" in device_id else device_id
+
+
+def add_properties_receiver(bus, handler, *interfaces: str):
+    """Call handler(interface, changed, invalidated, path=...) on PropertiesChanged of interfaces
+
+    The match rule filters on the interface argument, so the bus does not
+    wake us for property changes of other kdeconnect objects.
+    """
+    for interface in interfaces:
+        bus.add_signal_receiver(
+            handler, signal_name="PropertiesChanged", dbus_interface=PROPERTIES_IFACE,
+            bus_name=BUS_NAME, path_keyword="path", arg0=interface
+        )
+
+
+class Record:
+    """Base of the slotted result records below
+
+    Records also answer read-only mapping access (record["title"], "key" in
+    record, record.get()), so code that handles them alongside plain error
+    dicts ({"id": ..., "error": ...}) needs no special cases.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__dataclass_fields__
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__dataclass_fields__.keys()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+
+@dataclass(slots=True)
+class DeviceInfo(Record):
+    id: str
+    name: str
+    type: str
+    is_paired: bool
+    is_reachable: bool
+
+
+@dataclass(slots=True)
+class BatteryStatus(Record):
+    charge: int
+    is_charging: bool
+
+
+@dataclass(slots=True)
+class NowPlaying(Record):
+    title: str
+    artist: str
+    album: str
+    is_playing: bool
+    position: int
+    length: int
+    volume: int
+    available_players: List[str]
+    current_player: str
+
+
+@dataclass(slots=True)
+class Notification(Record):
+    id: str
+    app_name: str
+    title: str
+    text: str
+    ticker: str
+    dismissable: bool
+    has_icon: bool
+    silent: bool
+    reply_id: str
+    icon_path: str
+
+
+@dataclass(slots=True)
+class ReceivedFile(Record):
+    name: str
+    path: str
+    size: int
+    modified: str
+    modified_timestamp: float
+
+
+def _jsonable(obj):
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    return str(obj)
+
+
+try:
+    import orjson
+
+    def dumps(obj, indent: bool = False) -> str:
+        """Serialize tool and resource results to JSON, compact unless indent is set"""
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_jsonable, option=option).decode()
+except ImportError:
+    def dumps(obj, indent: bool = False) -> str:
+        """Serialize tool and resource results to JSON, compact unless indent is set"""
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False, default=_jsonable)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_jsonable)
+
+
+def start_main_loop() -> threading.Thread:
+    """Run the GLib main loop in a daemon thread so D-Bus signals are dispatched"""
+    # Imported here: PyGObject is slow to load and only needed once D-Bus is in use
+    from gi.repository import GLib
+    from dbus.mainloop.glib import DBusGMainLoop, threads_init
+
+    # Worker threads share the connection, see AsyncKDEConnectDBus
+    threads_init()
+    DBusGMainLoop(set_as_default=True)
+    loop = GLib.MainLoop()
+    thread = threading.Thread(target=loop.run, name="dbus-main-loop", daemon=True)
+    thread.start()
+    return thread
+
+
+class Metrics:
+    """Call counts, latency histograms, error counts and bytes returned
+
+    Series are keyed by kind ("tool", "method" for KDEConnectDBus methods and
+    "dbus" for individual D-Bus calls) and name. Enabled with
+    KDECONNECT_MCP_METRICS=1; when disabled nothing is wrapped at all, so the
+    only cost is a flag check when an interface is first pooled.
+    """
+
+    # Upper bounds of the latency histogram buckets in seconds, +Inf is implied
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, Dict[str, Any]] = {}
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False, nbytes: int = 0):
+        """Record one call"""
+        with self._lock:
+            series = self._series.get((kind, name))
+            if series is None:
+                series = self._series[(kind, name)] = {
+                    "calls": 0, "errors": 0, "bytes": 0, "seconds": 0.0,
+                    "buckets": [0] * (len(self.BUCKETS) + 1)
+                }
+            series["calls"] += 1
+            series["errors"] += error
+            series["bytes"] += nbytes
+            series["seconds"] += seconds
+            series["buckets"][bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+    def timed(self, kind: str, name: str, fn):
+        """Wrap a blocking callable so every call is observed"""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self.observe(kind, name, time.perf_counter() - start, error=True)
+                raise
+            self.observe(kind, name, time.perf_counter() - start)
+            return result
+        return wrapper
+
+    def instrument_class(self, cls, kind: str = "method"):
+        """Replace every public method of cls with a timed wrapper"""
+        for name, attr in list(vars(cls).items()):
+            if not name.startswith("_") and callable(attr):
+                setattr(cls, name, self.timed(kind, name, attr))
+
+    def interface(self, iface: dbus.Interface, interface: str):
+        """Return iface with its method calls observed as "dbus" series"""
+        return InstrumentedInterface(iface, interface, self)
+
+    def middleware(self):
+        """FastMCP middleware observing every tool call as a "tool" series"""
+        metrics = self
+
+        class MetricsMiddleware(Middleware):
+            async def on_call_tool(self, context, call_next):
+                name = context.message.name
+                start = time.perf_counter()
+                try:
+                    result = await call_next(context)
+                except Exception:
+                    metrics.observe("tool", name, time.perf_counter() - start, error=True)
+                    raise
+                nbytes = sum(len(getattr(block, "text", "") or "") for block in result.content)
+                metrics.observe("tool", name, time.perf_counter() - start, nbytes=nbytes)
+                return result
+
+        return MetricsMiddleware()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all series as nested dicts, kind -> name -> stats"""
+        result: Dict[str, Any] = {"enabled": self.enabled}
+        with self._lock:
+            for (kind, name), series in sorted(self._series.items()):
+                result.setdefault(kind, {})[name] = {
+                    "calls": series["calls"],
+                    "errors": series["errors"],
+                    "bytes": series["bytes"],
+                    "seconds_total": round(series["seconds"], 6),
+                    "seconds_avg": round(series["seconds"] / series["calls"], 6),
+                    "histogram": dict(zip([str(b) for b in self.BUCKETS] + ["+Inf"], series["buckets"]))
+                }
+        return result
+
+    def prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format"""
+        with self._lock:
+            items = sorted((key, dict(series, buckets=list(series["buckets"])))
+                           for key, series in self._series.items())
+
+        prefix = "kdeconnect_mcp"
+        lines = [
+            f"# HELP {prefix}_calls_total Calls by kind and name",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        lines += [f'{prefix}_calls_total{{kind="{k}",name="{n}"}} {s["calls"]}' for (k, n), s in items]
+        lines += [
+            f"# HELP {prefix}_errors_total Calls that raised",
+            f"# TYPE {prefix}_errors_total counter",
+        ]
+        lines += [f'{prefix}_errors_total{{kind="{k}",name="{n}"}} {s["errors"]}' for (k, n), s in items]
+        lines += [
+            f"# HELP {prefix}_response_bytes_total Bytes of text returned by tools",
+            f"# TYPE {prefix}_response_bytes_total counter",
+        ]
+        lines += [f'{prefix}_response_bytes_total{{kind="{k}",name="{n}"}} {s["bytes"]}'
+                  for (k, n), s in items if k == "tool"]
+        lines += [
+            f"# HELP {prefix}_latency_seconds Call latency",
+            f"# TYPE {prefix}_latency_seconds histogram",
+        ]
+        for (kind, name), series in items:
+            labels = f'kind="{kind}",name="{name}"'
+            cumulative = 0
+            for bound, count in zip([str(b) for b in self.BUCKETS] + ["+Inf"], series["buckets"]):
+                cumulative += count
+                lines.append(f'{prefix}_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{prefix}_latency_seconds_sum{{{labels}}} {series['seconds']:.6f}")
+            lines.append(f"{prefix}_latency_seconds_count{{{labels}}} {series['calls']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class InstrumentedInterface:
+    """dbus.Interface stand-in that times each method call by its D-Bus name"""
+
+    def __init__(self, iface: dbus.Interface, interface: str, metrics: Metrics):
+        self._iface = iface
+        self._interface = interface
+        self._metrics = metrics
+        self._methods: Dict[str, Any] = {}
+
+    def __getattr__(self, member: str):
+        method = self._methods.get(member)
+        if method is None:
+            method = self._methods[member] = self._metrics.timed(
+                "dbus", f"{self._interface}.{member}", getattr(self._iface, member)
+            )
+        return method
+
+
+metrics = Metrics(enabled=os.environ.get("KDECONNECT_MCP_METRICS") == "1")
+
+# Reply timeout in seconds for D-Bus calls made in the current context; None
+# leaves dbus-python's default of about 25 s. Worker threads inherit it
+# through AsyncKDEConnectDBus.run, which copies the caller's context.
+dbus_timeout: contextvars.ContextVar = contextvars.ContextVar("dbus_timeout", default=None)
+
+
+class TimeoutInterface:
+    """dbus.Interface stand-in that applies dbus_timeout to every method call"""
+
+    def __init__(self, iface: dbus.Interface):
+        self._iface = iface
+        self._methods: Dict[str, Any] = {}
+
+    def __getattr__(self, member: str):
+        method = self._methods.get(member)
+        if method is None:
+            call = getattr(self._iface, member)
+
+            def method(*args, **kwargs):
+                timeout = dbus_timeout.get()
+                if timeout is not None:
+                    kwargs.setdefault("timeout", timeout)
+                return call(*args, **kwargs)
+
+            self._methods[member] = method
+        return method
+
+
+class ProxyPool:
+    """Bounded LRU pool of D-Bus proxies and interfaces keyed by object path
+
+    Proxies are created with introspection disabled, since every interface we
+    call is known up front, so a pooled call costs exactly one round trip.
+    Entries are dropped when their object disappears (deviceRemoved,
+    notificationRemoved, allNotificationsRemoved) and the whole pool is flushed
+    when kdeconnectd restarts, because proxies are bound to the old owner.
+    """
+
+    def __init__(self, bus: dbus.SessionBus, bus_name: str, max_size: int = 256):
+        self.bus = bus
+        self.bus_name = bus_name
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        bus.add_signal_receiver(
+            self._on_device_removed, signal_name="deviceRemoved",
+            dbus_interface=DAEMON_IFACE, bus_name=bus_name
+        )
+        bus.add_signal_receiver(
+            self._on_notification_removed, signal_name="notificationRemoved",
+            dbus_interface=NOTIFICATIONS_IFACE,
+            bus_name=bus_name, path_keyword="path"
+        )
+        bus.add_signal_receiver(
+            self._on_all_notifications_removed, signal_name="allNotificationsRemoved",
+            dbus_interface=NOTIFICATIONS_IFACE,
+            bus_name=bus_name, path_keyword="path"
+        )
+        bus.add_signal_receiver(
+            self._on_name_owner_changed, signal_name="NameOwnerChanged",
+            dbus_interface="org.freedesktop.DBus", arg0=bus_name
+        )
+
+    def interface(self, path: str, interface: str) -> dbus.Interface:
+        """Return a pooled interface for the object at path"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = {"proxy": self.bus.get_object(self.bus_name, path, introspect=False)}
+                self._entries[path] = entry
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(path)
+            iface = entry.get(interface)
+            if iface is None:
+                iface = TimeoutInterface(dbus.Interface(entry["proxy"], interface))
+                if metrics.enabled:
+                    iface = metrics.interface(iface, interface)
+                entry[interface] = iface
+            return iface
+
+    def invalidate(self, path: str):
+        """Drop the proxy at path and every proxy below it"""
+        with self._lock:
+            for key in [k for k in self._entries if k == path or k.startswith(path + "/")]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _on_device_removed(self, device_id):
+        self.invalidate(f"{KDEConnectDBus.DEVICE_PATH_PREFIX}/{device_id}")
+
+    def _on_notification_removed(self, notif_id, path=None):
+        if path:
+            self.invalidate(f"{path}/{notif_id}")
+
+    def _on_all_notifications_removed(self, path=None):
+        if path:
+            self.invalidate(path)
+
+    def _on_name_owner_changed(self, name, old_owner, new_owner):
+        self.clear()
+
+
+class PlayerStateCache:
+    """Last-seen playback state of every media player on every device
+
+    The mprisremote plugin only exposes the currently selected player, so the
+    state of the other players is remembered from earlier reads and refreshed
+    from the plugin's change signals. detect_active_player can then answer
+    without switching the selected player on the phone.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def record(self, device_id: str, props: Dict[str, Any]):
+        """Remember the state of the selected player from an mprisremote GetAll"""
+        player = str(props.get("player", ""))
+        if not player:
+            return
+        state = {
+            "is_playing": bool(props.get("isPlaying", False)),
+            "title": str(props.get("title", "")),
+            "artist": str(props.get("artist", "")),
+            "seen_at": time.time()
+        }
+        players = props.get("playerList")
+        with self._lock:
+            states = self._states.setdefault(device_id, {})
+            states[player] = state
+            if players is not None:
+                # Drop players that have gone away on the phone
+                for gone in set(states) - {str(p) for p in players}:
+                    del states[gone]
+
+    def get(self, device_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return the known player states of a device"""
+        with self._lock:
+            return {player: dict(state) for player, state in self._states.get(device_id, {}).items()}
+
+    def start(self, kdeconnect: "KDEConnectDBus"):
+        """Refresh the selected player's state whenever mprisremote reports a change"""
+        self.kdeconnect = kdeconnect
+        kdeconnect.bus.add_signal_receiver(
+            self._on_changed, signal_name="propertiesChanged", dbus_interface=MPRIS_IFACE,
+            bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path"
+        )
+        add_properties_receiver(kdeconnect.bus, self._on_properties_changed, MPRIS_IFACE)
+
+    def _on_properties_changed(self, interface, changed, invalidated, path=None):
+        if str(interface) == MPRIS_IFACE:
+            self._on_changed(path=path)
+
+    def _on_changed(self, *args, path=None):
+        device_id = device_id_from_path(path, "/mprisremote")
+        if not device_id:
+            return
+        # Asynchronous: a blocking call here would stall the main loop, and with
+        # it every reply and signal, for a whole round trip per change
+        self.kdeconnect._get_properties(device_id, "mprisremote").GetAll(
+            MPRIS_IFACE,
+            reply_handler=lambda props: self.record(device_id, props),
+            error_handler=lambda error: None
+        )
+
+
+class NowPlayingCache:
+    """Now-playing state per device with the playback position interpolated
+
+    The position moves at one second per second while playing, so instead of
+    re-reading mprisremote for it, the last read is kept together with the
+    time it was taken and the position is extrapolated from there (clamped
+    to the track length). The device is read again only after an mprisremote
+    change signal (track, play state, seek), a media command sent by us, or
+    when the last read is older than ttl seconds.
+    """
+
+    def __init__(self, kdeconnect: "KDEConnectDBus", ttl: float = 30.0):
+        self.kdeconnect = kdeconnect
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # device_id -> {"result": get_now_playing result, "at": monotonic time, "version": int}
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._loop_thread: threading.Thread = None
+
+    def start(self, loop_thread: threading.Thread):
+        """Subscribe to mprisremote change signals; earlier reads are dropped"""
+        self._loop_thread = loop_thread
+        with self._lock:
+            self._states.clear()
+        bus = self.kdeconnect.bus
+        bus.add_signal_receiver(
+            self._on_changed, signal_name="propertiesChanged", dbus_interface=MPRIS_IFACE,
+            bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path"
+        )
+        add_properties_receiver(bus, self._on_properties_changed, MPRIS_IFACE)
+
+    def invalidate(self, device_id: str):
+        """Force the next get() for device_id to read from D-Bus"""
+        with self._lock:
+            self._versions[device_id] = self._versions.get(device_id, 0) + 1
+
+    def get(self, device_id: str) -> NowPlaying:
+        """Return now-playing information with the position as of now"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(device_id)
+            version = self._versions.get(device_id, 0)
+        if (state is None or state["version"] != version or now - state["at"] > self.ttl
+                or self._loop_thread is None or not self._loop_thread.is_alive()):
+            start = time.monotonic()
+            result = self.kdeconnect.get_now_playing(device_id)
+            if "error" in result:
+                return result
+            # The phone sampled the position somewhere during the round trip
+            at = (start + time.monotonic()) / 2
+            with self._lock:
+                self._states[device_id] = {"result": result, "at": at, "version": version}
+            state = {"result": result, "at": at}
+        return self.interpolate(state, time.monotonic())
+
+    @staticmethod
+    def interpolate(state: Dict[str, Any], now: float) -> NowPlaying:
+        result = state["result"]
+        position = result.position
+        if result.is_playing:
+            position += int((now - state["at"]) * 1000)
+            if result.length > 0:
+                position = min(position, result.length)
+        return replace(
+            result, position=max(position, 0), available_players=list(result.available_players)
+        )
+
+    def _on_properties_changed(self, interface, changed, invalidated, path=None):
+        if str(interface) == MPRIS_IFACE:
+            self._on_changed(path=path)
+
+    def _on_changed(self, *args, path=None):
+        device_id = device_id_from_path(path, "/mprisremote")
+        if device_id:
+            self.invalidate(device_id)
+
+
+def parse_kconfig(text: str) -> Dict[str, Dict[str, str]]:
+    """Parse a KDE INI-style config file into {group: {key: value}}
+
+    Handles KConfig escapes (\\s, \\t, \\n, \\\\), key flags such as
+    `key[$e]=` (environment expansion), nested group headers (`[A][B]` becomes
+    "A/B") and keys before the first header, which belong to "General".
+    Localized keys keep their locale, so `Name[de]` does not replace `Name`.
+    """
+    escapes = {"s": " ", "t": "\t", "n": "\n", "r": "\r", "\\": "\\"}
+    groups: Dict[str, Dict[str, str]] = {}
+    group = groups.setdefault("General", {})
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("["):
+            group = groups.setdefault(line[1:-1].replace("][", "/"), {})
+            continue
+        if "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        # Only trailing [$...] groups are flags; Name[de] is a key of its own
+        key, flags = re.fullmatch(r"(.*?)((?:\[\$[^\]]*\])*)", key.strip()).groups()
+        key = key.strip()
+
+        chars, i = [], 0
+        value = value.strip()
+        while i < len(value):
+            if value[i] == "\\" and i + 1 < len(value):
+                chars.append(escapes.get(value[i + 1], value[i + 1]))
+                i += 2
+            else:
+                chars.append(value[i])
+                i += 1
+        value = "".join(chars)
+        if "$e" in flags:
+            value = os.path.expandvars(value)
+        group[key] = value
+
+    return groups
+
+
+@dataclass(frozen=True)
+class ShareConfig:
+    """Settings of a device's share plugin"""
+    incoming_path: str
+    settings: Dict[str, str]
+
+
+class KDEConnectConfig:
+    """Parsed kdeconnect config files, cached until the file changes on disk
+
+    Each file is re-parsed only when its (mtime, inode, size) changes, and that
+    stat check itself runs at most once per check_interval seconds, so warm
+    lookups do no file I/O at all.
+    """
+
+    CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "kdeconnect")
+    DEFAULT_INCOMING_PATH = os.path.join(os.path.expanduser("~"), "Downloads")
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # path -> (checked_at, stat signature, parsed groups)
+        self._files: Dict[str, tuple] = {}
+
+    def read(self, path: str) -> Dict[str, Dict[str, str]]:
+        """Return the parsed groups of a config file ({} if it does not exist)"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._files.get(path)
+        if cached is not None and now - cached[0] < self.check_interval:
+            return cached[2]
+
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        except OSError:
+            signature = None
+
+        if cached is not None and cached[1] == signature:
+            groups = cached[2]
+        elif signature is None:
+            groups = {}
+        else:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    groups = parse_kconfig(f.read())
+            except (OSError, UnicodeDecodeError):
+                groups = {}
+
+        with self._lock:
+            self._files[path] = (now, signature, groups)
+        return groups
+
+    def plugin_config(self, device_id: str, plugin: str) -> Dict[str, str]:
+        """Return the General group of a device plugin's config"""
+        for path in (
+            # Current kdeconnect layout, then the older flat one
+            os.path.join(self.CONFIG_DIR, device_id, f"kdeconnect_{plugin}", "config"),
+            os.path.join(self.CONFIG_DIR, f"{device_id}_{plugin}", "config"),
+        ):
+            groups = self.read(path)
+            if groups:
+                return groups.get("General", {})
+        return {}
+
+    def share_config(self, device_id: str) -> ShareConfig:
+        """Return the share plugin settings of a device"""
+        settings = self.plugin_config(device_id, "share")
+        incoming_path = settings.get("incoming_path", "")
+        if incoming_path.startswith("file://"):
+            incoming_path = incoming_path[len("file://"):]
+        incoming_path = os.path.expanduser(incoming_path) if incoming_path else self.DEFAULT_INCOMING_PATH
+        return ShareConfig(incoming_path=incoming_path, settings=dict(settings))
+
+
+class ReceivedFilesCatalogue:
+    """mtime-ordered index of the files in a download directory
+
+    The directory is re-scanned with os.scandir only when its own mtime
+    changes, i.e. when an entry was added, removed or renamed. Only new names,
+    and names now backed by a different inode (deleted and received again),
+    are stat()ed during a re-scan. Queries walk the index from the newest file
+    and stop at `limit`, so a top-k lookup never touches the whole directory.
+    A file that grows or is rewritten in place does not change the directory,
+    so its size and mtime are only updated once some other entry changes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._dir_mtime_ns = None
+        self._files: Dict[str, tuple] = {}  # name -> (mtime, size, inode)
+        self._index: List[tuple] = []  # sorted (-mtime, name), newest first
+
+    def refresh(self):
+        """Re-scan the directory if its entries changed since the last scan"""
+        try:
+            dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            self._dir_mtime_ns = None
+            self._files, self._index = {}, []
+            return
+        if dir_mtime_ns == self._dir_mtime_ns:
+            return
+
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                known = self._files.get(entry.name)
+                try:
+                    # inode() comes with the directory entry, no extra syscall
+                    if known is not None and known[2] == entry.inode():
+                        files[entry.name] = known
+                        continue
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files[entry.name] = (stat.st_mtime, stat.st_size, entry.inode())
+
+        self._files = files
+        self._index = sorted((-mtime, name) for name, (mtime, size, inode) in files.items())
+        # Recorded last: entries added during the scan trigger another one next time
+        self._dir_mtime_ns = dir_mtime_ns
+
+    def query(
+        self,
+        limit: int = 10,
+        pattern: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None
+    ) -> List[ReceivedFile]:
+        """Return up to `limit` matching files, newest first"""
+        with self._lock:
+            self.refresh()
+            index, files = self._index, self._files
+
+        start = 0
+        if modified_before is not None:
+            start = bisect.bisect_left(index, (-modified_before, ""))
+
+        results = []
+        for position in range(start, len(index)):
+            if len(results) >= limit:
+                break
+            neg_mtime, name = index[position]
+            if modified_after is not None and -neg_mtime < modified_after:
+                break
+            size = files[name][1]
+            if pattern is not None and not fnmatch.fnmatch(name, pattern):
+                continue
+            if (min_size is not None and size < min_size) or (max_size is not None and size > max_size):
+                continue
+            results.append(ReceivedFile(
+                name=name,
+                path=os.path.join(self.directory, name),
+                size=size,
+                modified=time.ctime(-neg_mtime),
+                modified_timestamp=-neg_mtime
+            ))
+        return results
+
+
+class IconCache:
+    """Content-addressed, size-bounded on-disk cache of notification icon thumbnails
+
+    Thumbnails are stored as <sha256 of the source>-<max_size>.<ext>, so the
+    same icon arriving with every notification of an app is thumbnailed once.
+    Sources are identified by (path, mtime_ns, inode, size) in memory, so a
+    known file is not even re-read, and the base64 payloads of recently
+    served thumbnails are kept in memory too. Files are evicted least
+    recently used first once the cache exceeds max_bytes. Pillow is used for
+    thumbnailing when installed; otherwise icons are served as they are.
+    """
+
+    # Sources at least this large are hashed through mmap instead of read()
+    MMAP_THRESHOLD = 256 * 1024
+
+    MIME_TYPES = {"png": "image/png", "jpg": "image/jpeg", "gif": "image/gif", "webp": "image/webp"}
+
+    def __init__(self, directory: str = None, max_bytes: int = 32 * 1024 * 1024, max_encoded: int = 128):
+        self.directory = directory or os.path.join(
+            os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "kdeconnect-mcp", "icons"
+        )
+        self.max_bytes = max_bytes
+        self.max_encoded = max_encoded
+        self._lock = threading.Lock()
+        # file name -> size, least recently used first; None until the directory is scanned
+        self._entries: "OrderedDict[str, int]" = None
+        self._total = 0
+        # source file identity -> sha256 hex digest, most recently used last
+        self._digests: "OrderedDict[tuple, str]" = OrderedDict()
+        # (digest, max_size) -> (mime type, base64 data)
+        self._encoded: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def get(self, path: str, max_size: int = 128) -> Dict[str, Any]:
+        """Return {"mime_type", "data" (base64), "digest"} for the icon at path"""
+        digest = self._digest(path)
+        key = (digest, max_size)
+        with self._lock:
+            encoded = self._encoded.get(key)
+            if encoded is not None:
+                self._encoded.move_to_end(key)
+        if encoded is None:
+            ext, payload = self._thumbnail(path, digest, max_size)
+            encoded = (self.MIME_TYPES.get(ext, "application/octet-stream"),
+                       base64.b64encode(payload).decode("ascii"))
+            with self._lock:
+                self._encoded[key] = encoded
+                while len(self._encoded) > self.max_encoded:
+                    self._encoded.popitem(last=False)
+        return {"mime_type": encoded[0], "data": encoded[1], "digest": digest}
+
+    def _digest(self, path: str) -> str:
+        st = os.stat(path)
+        identity = (path, st.st_mtime_ns, st.st_ino, st.st_size)
+        with self._lock:
+            digest = self._digests.get(identity)
+            if digest is not None:
+                self._digests.move_to_end(identity)
+        if digest is None:
+            with open(path, "rb") as f:
+                if st.st_size >= self.MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        digest = hashlib.sha256(data).hexdigest()
+                else:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            with self._lock:
+                self._digests[identity] = digest
+                while len(self._digests) > 4 * self.max_encoded:
+                    self._digests.popitem(last=False)
+        return digest
+
+    def _thumbnail(self, path: str, digest: str, max_size: int) -> tuple:
+        """Return (extension, bytes) of the thumbnail, from the cache or freshly made"""
+        self._load()
+        prefix = f"{digest}-{max_size}."
+        with self._lock:
+            name = next((n for n in self._entries if n.startswith(prefix)), None)
+        if name is not None:
+            try:
+                cached = os.path.join(self.directory, name)
+                payload = self._read(cached)
+                # mtime records last use, so LRU order survives restarts
+                os.utime(cached)
+                with self._lock:
+                    if name in self._entries:
+                        self._entries.move_to_end(name)
+                return name[len(prefix):], payload
+            except FileNotFoundError:
+                with self._lock:
+                    self._total -= self._entries.pop(name, 0)
+
+        ext, payload = self._render(path, max_size)
+        name = prefix + ext
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = os.path.join(self.directory, f".{name}.{threading.get_ident()}")
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, os.path.join(self.directory, name))
+        with self._lock:
+            self._total += len(payload) - self._entries.pop(name, 0)
+            self._entries[name] = len(payload)
+            self._evict()
+        return ext, payload
+
+    def _read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= self.MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return data[:]
+            return f.read()
+
+    def _render(self, path: str, max_size: int) -> tuple:
+        try:
+            from PIL import Image
+        except ImportError:
+            payload = self._read(path)
+            return self._sniff(payload), payload
+
+        with Image.open(path) as image:
+            image.thumbnail((max_size, max_size))
+            out = io.BytesIO()
+            image.save(out, format="PNG", optimize=True)
+        return "png", out.getvalue()
+
+    @staticmethod
+    def _sniff(payload: bytes) -> str:
+        if payload.startswith(b"\x89PNG"):
+            return "png"
+        if payload.startswith(b"\xff\xd8"):
+            return "jpg"
+        if payload.startswith(b"GIF8"):
+            return "gif"
+        if payload[8:12] == b"WEBP":
+            return "webp"
+        return "bin"
+
+    def _load(self):
+        """Index the cache directory once, least recently used first"""
+        if self._entries is not None:
+            return
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.startswith("."):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, entry.name, st.st_size))
+        except FileNotFoundError:
+            pass
+        entries.sort()
+        with self._lock:
+            if self._entries is None:
+                self._entries = OrderedDict((name, size) for _, name, size in entries)
+                self._total = sum(self._entries.values())
+                self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+class DeviceUnreachableError(ToolError):
+    """A call refused without touching D-Bus because the device cannot answer it
+
+    The message is a JSON object ({"error": "device_unreachable", "device_id",
+    "reason", "message"[, "retry_in"]}) so clients can tell it apart from
+    other failures. reason is "offline" when kdeconnectd reports the device
+    unreachable and "not_answering" while its circuit breaker is open.
+    """
+
+    def __init__(self, device_id: str, reason: str, message: str, retry_in: float = None):
+        self.device_id = device_id
+        self.reason = reason
+        self.retry_in = retry_in
+        self.details = {"error": "device_unreachable", "device_id": device_id, "reason": reason, "message": message}
+        if retry_in is not None:
+            self.details["retry_in"] = retry_in
+        super().__init__(dumps(self.details))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.details)
+
+
+class DeviceScheduler:
+    """Per-device ordering, limits and circuit breaking for KDEConnectDBus calls
+
+    Every KDEConnectDBus method whose first argument is a device id runs in
+    that device's lane. Mutations run one at a time in arrival order and
+    exclude reads; reads run in parallel, at most max_readers at once. A lane
+    holds at most max_queue waiting calls and a call waits at most timeout
+    seconds, so a flood against one device cannot tie up every worker thread.
+    After failure_threshold consecutive calls to a device fail the way an
+    unreachable phone fails (no reply, timeout), its breaker opens and calls
+    are refused at once for cooldown seconds; then a single trial call is let
+    through and either closes the breaker or opens it again. Methods that
+    turn such an error into a result value report it with report(). When a
+    reachability callback is set, calls that need the phone are refused at
+    once while it reports the device unreachable.
+
+    Nested calls on a thread that already holds the lane, and calls from the
+    D-Bus main loop thread (which must never block), are not scheduled.
+    """
+
+    # Methods that change state on the phone
+    WRITES = {
+        "set_media_player", "send_media_commands", "send_notification_actions", "media_control",
+        "send_ping", "share_url", "share_file", "share_files", "ring_device",
+    }
+    # Methods that change state only for some arguments: name -> predicate(device_id, *args, **kwargs)
+    WRITES_WHEN = {
+        # The passive mode only reads; the sweep switches players on the phone
+        "detect_active_player": lambda device_id, mode="passive": mode == "sweep",
+    }
+    # Answered by kdeconnectd or from local files, so they work while the phone is away
+    LOCAL = {
+        "get_device_info", "get_download_directory", "get_share_settings",
+        "received_files_catalogue", "list_received_files",
+    }
+    # D-Bus errors and exceptions that count towards opening a breaker
+    FAILURES = {
+        "org.freedesktop.DBus.Error.NoReply",
+        "org.freedesktop.DBus.Error.Timeout",
+        "org.freedesktop.DBus.Error.TimedOut",
+    }
+
+    def __init__(self, max_readers: int = 4, max_queue: int = 16, timeout: float = 30.0,
+                 failure_threshold: int = 3, cooldown: float = 30.0):
+        self.max_readers = max_readers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._lanes: Dict[str, Dict[str, Any]] = {}
+        self._held = threading.local()
+        self._loop_thread: threading.Thread = None
+        # reachability(device_id) -> True, False, or None when not known
+        self.reachability = None
+
+    def start(self, loop_thread: threading.Thread):
+        self._loop_thread = loop_thread
+
+    def schedule_class(self, cls):
+        """Replace every public per-device method of cls with a scheduled wrapper"""
+        for name, attr in list(vars(cls).items()):
+            if name.startswith("_") or not callable(attr):
+                continue
+            params = list(inspect.signature(attr).parameters)
+            if params[1:2] == ["device_id"]:
+                setattr(cls, name, self.scheduled(
+                    name, attr, write=self.WRITES_WHEN.get(name, name in self.WRITES),
+                    needs_device=name not in self.LOCAL
+                ))
+
+    def scheduled(self, name: str, fn, write, needs_device: bool = True):
+        """Wrap a blocking method(self, device_id, ...) so it runs in the device's lane
+
+        write is a bool, or a predicate over the call's arguments.
+        """
+        @functools.wraps(fn)
+        def wrapper(instance, device_id, *args, **kwargs):
+            held = getattr(self._held, "lanes", None)
+            if held is None:
+                held = self._held.lanes = set()
+            if device_id in held or threading.current_thread() is self._loop_thread:
+                return fn(instance, device_id, *args, **kwargs)
+            if needs_device:
+                self._check_reachable(device_id)
+            write_call = write(device_id, *args, **kwargs) if callable(write) else write
+            lane, trial = self._acquire(device_id, write_call, name, gated=needs_device)
+            held.add(device_id)
+            reported = self._reported()
+            reported.discard(device_id)
+            try:
+                result = fn(instance, device_id, *args, **kwargs)
+            except Exception as e:
+                # Only calls that need the phone say anything about whether it answers
+                failed = self._is_failure(e) or device_id in reported
+                self._release(lane, write_call, trial, failed=failed if needs_device else None)
+                raise
+            else:
+                failed = device_id in reported
+            finally:
+                held.discard(device_id)
+                reported.discard(device_id)
+            self._release(lane, write_call, trial, failed=failed if needs_device else None)
+            return result
+        return wrapper
+
+    def report(self, device_id: str, error: Exception):
+        """Count an error that a scheduled method caught and returned as a value
+
+        Readers that answer {"error": ...} instead of raising call this, so a
+        phone that stopped answering still opens the breaker.
+        """
+        if self._is_failure(error):
+            self._reported().add(device_id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth, activity, counters and breaker state per device"""
+        now = time.monotonic()
+        with self._lock:
+            devices = {}
+            for device_id, lane in sorted(self._lanes.items()):
+                devices[device_id] = {
+                    "queued": lane["queued"],
+                    "max_queued": lane["max_queued"],
+                    "active_reads": lane["readers"],
+                    "active_write": lane["writer"],
+                    "calls": lane["calls"],
+                    "rejected": lane["rejected"],
+                    "offline": lane["offline"],
+                    "timeouts": lane["timeouts"],
+                    "breaker": self._breaker_state(lane, now),
+                    "consecutive_failures": lane["failures"],
+                    "retry_in": round(max(0.0, lane["open_until"] - now), 1),
+                }
+            return {"devices": devices, "queued": sum(d["queued"] for d in devices.values())}
+
+    def prometheus(self) -> str:
+        """Queue depth, activity and breaker state per device as Prometheus gauges"""
+        devices = self.snapshot()["devices"]
+        prefix = "kdeconnect_mcp_device"
+        gauges = [
+            ("queued", "Calls waiting for their turn", lambda d: d["queued"]),
+            ("active", "Calls running", lambda d: d["active_reads"] + d["active_write"]),
+            ("rejected_total", "Calls refused by a full queue or an open breaker", lambda d: d["rejected"]),
+            ("wait_timeouts_total", "Calls that gave up waiting", lambda d: d["timeouts"]),
+            ("breaker_open", "1 while calls to the device are refused", lambda d: int(d["breaker"] == "open")),
+        ]
+        lines = []
+        for name, help_text, value in gauges:
+            kind = "counter" if name.endswith("_total") else "gauge"
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} {kind}"]
+            lines += [f'{prefix}_{name}{{device="{device_id}"}} {value(d)}' for device_id, d in devices.items()]
+        return "\n".join(lines) + "\n"
+
+    def _reported(self) -> set:
+        # Devices with a failure reported on this thread during the current call
+        reported = getattr(self._held, "reported", None)
+        if reported is None:
+            reported = self._held.reported = set()
+        return reported
+
+    def _lane(self, device_id: str) -> Dict[str, Any]:
+        lane = self._lanes.get(device_id)
+        if lane is None:
+            lane = self._lanes[device_id] = {
+                "cond": threading.Condition(self._lock),
+                # Waiting mutations in arrival order
+                "writers": deque(),
+                "readers": 0, "writer": False,
+                "queued": 0, "max_queued": 0, "calls": 0, "rejected": 0, "offline": 0, "timeouts": 0,
+                "failures": 0, "open_until": 0.0, "trial": False,
+            }
+        return lane
+
+    def _breaker_state(self, lane: Dict[str, Any], now: float) -> str:
+        if lane["failures"] < self.failure_threshold:
+            return "closed"
+        return "open" if now < lane["open_until"] or lane["trial"] else "half-open"
+
+    def _check_reachable(self, device_id: str):
+        if self.reachability is None or self.reachability(device_id) is not False:
+            return
+        with self._lock:
+            self._lane(device_id)["offline"] += 1
+        raise DeviceUnreachableError(device_id, "offline", f"{device_id} is not reachable")
+
+    def _acquire(self, device_id: str, write: bool, name: str, gated: bool = True) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            lane = self._lane(device_id)
+            state = self._breaker_state(lane, now) if gated else "closed"
+            if state == "open":
+                lane["rejected"] += 1
+                retry_in = round(max(0.0, lane["open_until"] - now), 1)
+                raise DeviceUnreachableError(
+                    device_id, "not_answering",
+                    f"{device_id} is not answering ({lane['failures']} failed calls in a row)", retry_in
+                )
+            if lane["queued"] >= self.max_queue:
+                lane["rejected"] += 1
+                raise RuntimeError(f"{device_id} has {lane['queued']} calls queued, try again later")
+            # Half-open: this call is the trial, everything else is refused until it returns
+            trial = state == "half-open"
+            lane["trial"] = lane["trial"] or trial
+
+            cond = lane["cond"]
+            # A call with its own D-Bus timeout will not wait longer than that either
+            timeout = min(self.timeout, dbus_timeout.get() or self.timeout)
+            lane["queued"] += 1
+            lane["max_queued"] = max(lane["max_queued"], lane["queued"])
+            if write:
+                token = object()
+                lane["writers"].append(token)
+                ready = cond.wait_for(
+                    lambda: lane["writers"][0] is token and not lane["writer"] and lane["readers"] == 0,
+                    timeout
+                )
+                lane["writers"].remove(token)
+                lane["writer"] = ready
+            else:
+                ready = cond.wait_for(
+                    lambda: not lane["writer"] and not lane["writers"] and lane["readers"] < self.max_readers,
+                    timeout
+                )
+                lane["readers"] += ready
+            lane["queued"] -= 1
+            if not ready:
+                lane["timeouts"] += 1
+                if trial:
+                    lane["trial"] = False
+                cond.notify_all()
+                raise TimeoutError(f"{name} on {device_id} waited more than {timeout} s for its turn")
+            lane["calls"] += 1
+            return lane, trial
+
+    def _release(self, lane: Dict[str, Any], write: bool, trial: bool, failed: Optional[bool]):
+        with self._lock:
+            if write:
+                lane["writer"] = False
+            else:
+                lane["readers"] -= 1
+            if failed:
+                lane["failures"] += 1
+                if lane["failures"] >= self.failure_threshold:
+                    lane["open_until"] = time.monotonic() + self.cooldown
+            elif failed is not None:
+                lane["failures"] = 0
+            if trial:
+                lane["trial"] = False
+            lane["cond"].notify_all()
+
+    def _is_failure(self, error: Exception) -> bool:
+        if isinstance(error, dbus.exceptions.DBusException):
+            return error.get_dbus_name() in self.FAILURES
+        return isinstance(error, TimeoutError)
+
+
+scheduler = DeviceScheduler()
 
 
 class KDEConnectDBus:
     """D-Bus interface for KDE Connect"""
 
-    BUS_NAME = "org.kde.kdeconnect"
+    BUS_NAME = BUS_NAME
     DAEMON_PATH = "/modules/kdeconnect"
-    DEVICE_PATH_PREFIX = "/modules/kdeconnect/devices"
+    DEVICE_PATH_PREFIX = DEVICE_PATH_PREFIX
 
     def __init__(self):
-        self.bus = dbus.SessionBus()
-        self.daemon = self.bus.get_object(self.BUS_NAME, self.DAEMON_PATH)
+        self.bus = dbus.SessionBus(private=True)
+        self.proxies = ProxyPool(self.bus, self.BUS_NAME)
+        self.player_states = PlayerStateCache()
+        self.received_files: Dict[str, ReceivedFilesCatalogue] = {}
+        self.config = KDEConnectConfig()
 
     def _get_device_interface(self, device_id: str, plugin: str = None) -> dbus.Interface:
         """Get D-Bus interface for device/plugin"""
         path = f"{self.DEVICE_PATH_PREFIX}/{device_id}"
         if plugin:
             path += f"/{plugin}"
-        obj = self.bus.get_object(self.BUS_NAME, path)
-        return dbus.Interface(
-            obj,
-            f"org.kde.kdeconnect.device.{plugin}" if plugin else "org.kde.kdeconnect.device"
+        return self.proxies.interface(
+            path,
+            f"{DEVICE_IFACE}.{plugin}" if plugin else DEVICE_IFACE
         )
 
     def _get_properties(self, device_id: str, plugin: str) -> dbus.Interface:
         """Get properties interface for plugin"""
         path = f"{self.DEVICE_PATH_PREFIX}/{device_id}/{plugin}"
-        obj = self.bus.get_object(self.BUS_NAME, path)
-        return dbus.Interface(obj, "org.freedesktop.DBus.Properties")
+        return self.proxies.interface(path, PROPERTIES_IFACE)
+
+    def _get_all(self, path: str, interface: str) -> Dict[str, Any]:
+        """Fetch every property of an interface in a single GetAll round trip"""
+        props_iface = self.proxies.interface(path, PROPERTIES_IFACE)
+        return dict(props_iface.GetAll(interface))
+
+    def _get_plugin_properties(self, device_id: str, plugin: str) -> Dict[str, Any]:
+        """Fetch all properties of a device plugin"""
+        return self._get_all(
+            f"{self.DEVICE_PATH_PREFIX}/{device_id}/{plugin}",
+            f"{DEVICE_IFACE}.{plugin}"
+        )
 
     def list_devices(self, reachable_only: bool = True, paired_only: bool = True) -> List[str]:
         """List all devices"""
-        daemon_iface = dbus.Interface(self.daemon, "org.kde.kdeconnect.daemon")
-        return list(daemon_iface.devices(paired_only, reachable_only))
+        daemon_iface = self.proxies.interface(self.DAEMON_PATH, DAEMON_IFACE)
+        return list(daemon_iface.devices(reachable_only, paired_only))
 
-    def get_device_info(self, device_id: str) -> Dict[str, Any]:
+    def get_device_info(self, device_id: str) -> DeviceInfo:
         """Get device information"""
-        path = f"{self.DEVICE_PATH_PREFIX}/{device_id}"
-        obj = self.bus.get_object(self.BUS_NAME, path)
-        props_iface = dbus.Interface(obj, "org.freedesktop.DBus.Properties")
-
-        info = {
-            "id": device_id,
-            "name": str(props_iface.Get("org.kde.kdeconnect.device", "name")),
-            "type": str(props_iface.Get("org.kde.kdeconnect.device", "type")),
-            "is_paired": bool(props_iface.Get("org.kde.kdeconnect.device", "isPaired")),
-            "is_reachable": bool(props_iface.Get("org.kde.kdeconnect.device", "isReachable"))
-        }
-        return info
+        props = self._get_all(f"{self.DEVICE_PATH_PREFIX}/{device_id}", DEVICE_IFACE)
+        return self._device_info(device_id, props)
+
+    @staticmethod
+    def _device_info(device_id: str, props: Dict[str, Any]) -> DeviceInfo:
+        return DeviceInfo(
+            id=device_id,
+            name=str(props["name"]),
+            type=str(props["type"]),
+            is_paired=bool(props["isPaired"]),
+            is_reachable=bool(props["isReachable"])
+        )
 
-    def get_battery(self, device_id: str) -> Dict[str, Any]:
+    def get_battery(self, device_id: str) -> BatteryStatus:
         """Get battery status"""
-        props = self._get_properties(device_id, "battery")
-        return {
-            "charge": int(props.Get("org.kde.kdeconnect.device.battery", "charge")),
-            "is_charging": bool(props.Get("org.kde.kdeconnect.device.battery", "isCharging"))
-        }
+        props = self._get_plugin_properties(device_id, "battery")
+        return BatteryStatus(
+            charge=int(props["charge"]),
+            is_charging=bool(props["isCharging"])
+        )
 
     def get_media_players(self, device_id: str) -> List[str]:
         """Get list of available media players"""
         props = self._get_properties(device_id, "mprisremote")
         try:
-            players = props.Get("org.kde.kdeconnect.device.mprisremote", "playerList")
+            players = props.Get(MPRIS_IFACE, "playerList")
             return list(players) if players else []
-        except:
+        except Exception as e:
+            scheduler.report(device_id, e)
             return []
 
     def set_media_player(self, device_id: str, player: str):
         """Set active media player"""
         props = self._get_properties(device_id, "mprisremote")
-        props.Set("org.kde.kdeconnect.device.mprisremote", "player", player)
+        props.Set(MPRIS_IFACE, "player", player, signature="ssv")
+
+    def send_media_commands(self, device_id: str, commands: List[tuple], max_in_flight: int = 4,
+                            timeout: float = None):
+        """Send ("player", name) and ("action", name) commands in order, pipelined
+
+        Replies arrive on the main loop; the first error is raised once every
+        call has been answered or timed out.
+        """
+        mpris = MPRIS_IFACE
+        props = self._get_properties(device_id, "mprisremote")
+        iface = self._get_device_interface(device_id, "mprisremote")
+        calls = [
+            functools.partial(props.Set, mpris, "player", value, signature="ssv") if kind == "player"
+            else functools.partial(iface.sendAction, value)
+            for kind, value in commands
+        ]
+        errors = [e for e in self._pipeline(device_id, calls, max_in_flight, timeout) if e is not None]
+        if errors:
+            raise errors[0]
+
+    def send_notification_actions(self, device_id: str, actions: List[tuple], max_in_flight: int = 16,
+                                  timeout: float = None) -> List[Optional[Exception]]:
+        """Call ("dismiss", id) or ("sendReply", id, message) on notification objects, pipelined
+
+        Returns one entry per action: None when it succeeded, else the error.
+        """
+        calls = []
+        for name, notif_id, *args in actions:
+            iface = self.proxies.interface(
+                f"{self.DEVICE_PATH_PREFIX}/{device_id}/notifications/{notif_id}",
+                NOTIFICATION_IFACE
+            )
+            calls.append(functools.partial(getattr(iface, name), *args))
+        return self._pipeline(device_id, calls, max_in_flight, timeout)
+
+    def _pipeline(self, device_id: str, calls: List, max_in_flight: int,
+                  timeout: float = None) -> List[Optional[Exception]]:
+        """Make asynchronous D-Bus calls in order with at most max_in_flight unanswered
+
+        Each call is a callable taking reply_handler and error_handler. Messages
+        from one connection are delivered in order, so each call is written as
+        soon as a slot frees up instead of after the previous reply. Returns
+        one entry per call, None or the error; calls not answered (or not
+        sent) within timeout get a TimeoutError.
+        """
+        timeout = timeout or dbus_timeout.get() or 25.0
+        slots = threading.Semaphore(max_in_flight)
+        lock = threading.Lock()
+        done = threading.Event()
+        expired = TimeoutError(f"{device_id} did not answer within {timeout} s")
+        outcomes: List[Optional[Exception]] = [expired] * len(calls)
+        remaining = [len(calls)]
+
+        def finished(index: int, error=None):
+            with lock:
+                outcomes[index] = error
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+            slots.release()
+
+        def replied(index: int, *values):
+            finished(index)
+
+        if not calls:
+            return []
+        deadline = time.monotonic() + timeout
+        for index, call in enumerate(calls):
+            if not slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                break
+            call(reply_handler=functools.partial(replied, index),
+                 error_handler=functools.partial(finished, index))
+        done.wait(max(0.0, deadline - time.monotonic()))
+        with lock:
+            return list(outcomes)
 
     def get_current_player(self, device_id: str) -> str:
         """Get current active player"""
         props = self._get_properties(device_id, "mprisremote")
         try:
-            return str(props.Get("org.kde.kdeconnect.device.mprisremote", "player"))
-        except:
+            return str(props.Get(MPRIS_IFACE, "player"))
+        except Exception as e:
+            scheduler.report(device_id, e)
             return ""
 
-    def detect_active_player(self, device_id: str) -> Dict[str, Any]:
-        """Detect which player is actually playing media"""
-        import time
+    def detect_active_player(self, device_id: str, mode: str = "passive") -> Dict[str, Any]:
+        """Detect which player is actually playing media
+
+        "passive" never changes the selected player: the current player is read
+        live and the others are reported from PlayerStateCache. "sweep" switches
+        to every player in turn, which is complete but slow and visible on the phone.
+        """
+        if mode == "sweep":
+            return self._sweep_active_player(device_id)
+
+        props = self._get_plugin_properties(device_id, "mprisremote")
+        self.player_states.record(device_id, props)
+        players = list(props.get("playerList") or [])
+        current_player = str(props.get("player", ""))
+        known = self.player_states.get(device_id)
+        now = time.time()
+
+        active_players = []
+        player_info = {}
+
+        for player in players:
+            state = known.get(player)
+            if state is None:
+                player_info[player] = {"is_playing": None, "has_media": None, "source": "unknown"}
+                continue
+
+            player_info[player] = {
+                "is_playing": state["is_playing"],
+                "has_media": bool(state["title"] or state["artist"]),
+                "title": state["title"],
+                "artist": state["artist"],
+                "source": "live" if player == current_player else "cached",
+                "age_seconds": round(now - state["seen_at"], 1)
+            }
+
+            if state["is_playing"] and (state["title"] or state["artist"]):
+                active_players.append(player)
+
+        return {
+            "active_players": active_players,
+            "player_details": player_info,
+            "original_player": current_player,
+            "mode": "passive"
+        }
 
-        players = self.get_media_players(device_id)
-        current_player = self.get_current_player(device_id)
+    def _sweep_active_player(self, device_id: str) -> Dict[str, Any]:
+        """Switch to each player in turn and read its state, then restore the original"""
+        initial = self._get_plugin_properties(device_id, "mprisremote")
+        players = list(initial.get("playerList") or [])
+        current_player = str(initial.get("player", ""))
         props = self._get_properties(device_id, "mprisremote")
 
         active_players = []
@@ -114,13 +1480,15 @@ class KDEConnectDBus:
         for player in players:
             try:
                 # Switch to this player
-                props.Set("org.kde.kdeconnect.device.mprisremote", "player", player)
+                props.Set(MPRIS_IFACE, "player", player, signature="ssv")
                 time.sleep(0.3)  # Wait for switch
 
                 # Check if playing
-                is_playing = bool(props.Get("org.kde.kdeconnect.device.mprisremote", "isPlaying"))
-                title = str(props.Get("org.kde.kdeconnect.device.mprisremote", "title"))
-                artist = str(props.Get("org.kde.kdeconnect.device.mprisremote", "artist"))
+                state = self._get_plugin_properties(device_id, "mprisremote")
+                self.player_states.record(device_id, state)
+                is_playing = bool(state["isPlaying"])
+                title = str(state["title"])
+                artist = str(state["artist"])
 
                 player_info[player] = {
                     "is_playing": is_playing,
@@ -133,41 +1501,43 @@ class KDEConnectDBus:
                     active_players.append(player)
 
             except Exception as e:
+                scheduler.report(device_id, e)
                 player_info[player] = {"error": str(e)}
 
         # Restore original player
         if current_player:
             try:
-                props.Set("org.kde.kdeconnect.device.mprisremote", "player", current_player)
+                props.Set(MPRIS_IFACE, "player", current_player, signature="ssv")
             except:
                 pass
 
         return {
             "active_players": active_players,
             "player_details": player_info,
-            "original_player": current_player
+            "original_player": current_player,
+            "mode": "sweep"
         }
 
-    def get_now_playing(self, device_id: str) -> Dict[str, Any]:
+    def get_now_playing(self, device_id: str) -> NowPlaying:
         """Get currently playing media information"""
-        props = self._get_properties(device_id, "mprisremote")
         try:
-            players = self.get_media_players(device_id)
-            current_player = self.get_current_player(device_id)
-
-            result = {
-                "title": str(props.Get("org.kde.kdeconnect.device.mprisremote", "title")),
-                "artist": str(props.Get("org.kde.kdeconnect.device.mprisremote", "artist")),
-                "album": str(props.Get("org.kde.kdeconnect.device.mprisremote", "album")),
-                "is_playing": bool(props.Get("org.kde.kdeconnect.device.mprisremote", "isPlaying")),
-                "position": int(props.Get("org.kde.kdeconnect.device.mprisremote", "position")),
-                "length": int(props.Get("org.kde.kdeconnect.device.mprisremote", "length")),
-                "volume": int(props.Get("org.kde.kdeconnect.device.mprisremote", "volume")),
-                "available_players": players,
-                "current_player": current_player
-            }
-            return result
+            props = self._get_plugin_properties(device_id, "mprisremote")
+            self.player_states.record(device_id, props)
+            players = props.get("playerList")
+
+            return NowPlaying(
+                title=str(props["title"]),
+                artist=str(props["artist"]),
+                album=str(props["album"]),
+                is_playing=bool(props["isPlaying"]),
+                position=int(props["position"]),
+                length=int(props["length"]),
+                volume=int(props["volume"]),
+                available_players=[str(p) for p in players] if players else [],
+                current_player=str(props.get("player", ""))
+            )
         except Exception as e:
+            scheduler.report(device_id, e)
             return {"error": str(e)}
 
     def media_control(self, device_id: str, action: str):
@@ -190,9 +1560,14 @@ class KDEConnectDBus:
 
     def share_file(self, device_id: str, file_path: str):
         """Share file to device"""
+        self.share_files(device_id, [file_path])
+
+    def share_files(self, device_id: str, file_paths: List[str]):
+        """Share several files to device in a single shareUrls call"""
         iface = self._get_device_interface(device_id, "share")
-        file_url = f"file://{file_path}"
-        iface.shareUrls([file_url])
+        # as_uri() percent-encodes spaces, "#" and "%", which a plain "file://" + path does not
+        urls = [pathlib.Path(file_path).resolve().as_uri() for file_path in file_paths]
+        iface.shareUrls(urls, signature="as")
 
     def ring_device(self, device_id: str):
         """Ring the device"""
@@ -201,53 +1576,37 @@ class KDEConnectDBus:
 
     def get_download_directory(self, device_id: str) -> str:
         """Get the download directory for received files"""
-        import os
-        home = os.path.expanduser("~")
-        default_download = os.path.join(home, "Downloads")
+        return self.config.share_config(device_id).incoming_path
 
-        try:
-            config_path = os.path.join(home, ".config", "kdeconnect", device_id + "_share", "config")
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    for line in f:
-                        if line.startswith("incoming_path="):
-                            return line.split("=", 1)[1].strip()
-        except:
-            pass
-
-        return default_download
-
-    def list_received_files(self, device_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """List recently received files from device"""
-        import os
-        import time
+    def get_share_settings(self, device_id: str) -> Dict[str, Any]:
+        """Get all share plugin settings"""
+        share = self.config.share_config(device_id)
+        return {"incoming_path": share.incoming_path, "settings": share.settings}
 
+    def received_files_catalogue(self, device_id: str) -> ReceivedFilesCatalogue:
+        """Get the catalogue of the device's download directory"""
         download_dir = self.get_download_directory(device_id)
-
-        if not os.path.exists(download_dir):
-            return []
-
-        files = []
-        for filename in os.listdir(download_dir):
-            filepath = os.path.join(download_dir, filename)
-            if os.path.isfile(filepath):
-                stat = os.stat(filepath)
-                files.append({
-                    "name": filename,
-                    "path": filepath,
-                    "size": stat.st_size,
-                    "modified": time.ctime(stat.st_mtime),
-                    "modified_timestamp": stat.st_mtime
-                })
-
-        # Sort by modification time (newest first)
-        files.sort(key=lambda x: x["modified_timestamp"], reverse=True)
-
-        return files[:limit]
+        catalogue = self.received_files.get(download_dir)
+        if catalogue is None:
+            catalogue = self.received_files.setdefault(download_dir, ReceivedFilesCatalogue(download_dir))
+        return catalogue
+
+    def list_received_files(
+        self,
+        device_id: str,
+        limit: int = 10,
+        pattern: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """List recently received files from device"""
+        catalogue = self.received_files_catalogue(device_id)
+        return catalogue.query(limit, pattern, min_size, max_size, modified_after, modified_before)
 
     def open_received_file(self, file_path: str):
         """Open a received file with default application"""
-        import subprocess
         subprocess.Popen(["xdg-open", file_path])
 
     def get_notifications(self, device_id: str) -> List[Dict[str, Any]]:
@@ -255,53 +1614,1310 @@ class KDEConnectDBus:
         iface = self._get_device_interface(device_id, "notifications")
         notification_ids = list(iface.activeNotifications())
 
-        notifications = []
-        for notif_id in notification_ids:
+        return [self.get_notification(device_id, str(notif_id)) for notif_id in notification_ids]
+
+    def get_notification(self, device_id: str, notif_id: str) -> Notification:
+        """Get the details of a single notification"""
+        try:
+            # Get all properties of the notification object at once
+            notif_path = f"{self.DEVICE_PATH_PREFIX}/{device_id}/notifications/{notif_id}"
+            notif_props = self._get_all(
+                notif_path, NOTIFICATION_IFACE
+            )
+            return self._notification(notif_id, notif_props)
+        except Exception as e:
+            scheduler.report(device_id, e)
+            return {
+                "id": notif_id,
+                "error": str(e)
+            }
+
+    @staticmethod
+    def _notification(notif_id: str, notif_props: Dict[str, Any]) -> Notification:
+        return Notification(
+            id=notif_id,
+            app_name=str(notif_props["appName"]),
+            title=str(notif_props["title"]),
+            text=str(notif_props["text"]),
+            ticker=str(notif_props["ticker"]),
+            dismissable=bool(notif_props["dismissable"]),
+            has_icon=bool(notif_props["hasIcon"]),
+            silent=bool(notif_props["silent"]),
+            # replyId is only present on notifications that support replies
+            reply_id=str(notif_props.get("replyId", "")),
+            # Local copy of the icon kdeconnectd received, if any
+            icon_path=str(notif_props.get("iconPath", ""))
+        )
+
+
+scheduler.schedule_class(KDEConnectDBus)
+if metrics.enabled:
+    metrics.instrument_class(KDEConnectDBus)
+
+
+class DeviceStateCache:
+    """In-memory device state kept current from kdeconnect D-Bus signals
+
+    The cache is seeded once with every known device and then updated from the
+    daemon's deviceAdded / deviceRemoved / deviceVisibilityChanged signals and
+    the devices' own signals, so reads are served without any bus traffic.
+    A full re-sync happens when the data is older than max_age, when the
+    kdeconnect daemon restarts, or when the main loop delivering signals dies.
+    Signal handlers run on the main loop, so they re-read a device with an
+    asynchronous GetAll instead of a blocking call.
+    """
+
+    def __init__(self, kdeconnect: KDEConnectDBus, max_age: float = 300.0):
+        self.kdeconnect = kdeconnect
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        self._synced_at = 0.0
+        self._stale = True
+        # Bumped when the daemon goes away, and by every completed resync
+        self._epoch = 0
+        self._generation = 0
+        # Devices changed by signals while a resync is fetching, None outside one
+        self._touched: set = None
+        self._resync_lock = threading.Lock()
+        self._background = False
+        self._loop_thread: threading.Thread = None
+
+    def start(self, loop_thread: threading.Thread):
+        """Subscribe to kdeconnect signals and seed the cache in the background"""
+        self._loop_thread = loop_thread
+        bus = self.kdeconnect.bus
+        bus.add_signal_receiver(
+            self._on_device_added, signal_name="deviceAdded",
+            dbus_interface=DAEMON_IFACE, bus_name=KDEConnectDBus.BUS_NAME
+        )
+        bus.add_signal_receiver(
+            self._on_device_removed, signal_name="deviceRemoved",
+            dbus_interface=DAEMON_IFACE, bus_name=KDEConnectDBus.BUS_NAME
+        )
+        bus.add_signal_receiver(
+            self._on_visibility_changed, signal_name="deviceVisibilityChanged",
+            dbus_interface=DAEMON_IFACE, bus_name=KDEConnectDBus.BUS_NAME
+        )
+        add_properties_receiver(bus, self._on_properties_changed, DEVICE_IFACE)
+        # kdeconnectd also announces changes through per-property signals
+        # (reachableChanged, nameChanged, pairStateChanged, ...)
+        bus.add_signal_receiver(
+            self._on_device_signal, dbus_interface=DEVICE_IFACE,
+            bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path", member_keyword="member"
+        )
+        bus.add_signal_receiver(
+            self._on_name_owner_changed, signal_name="NameOwnerChanged",
+            dbus_interface="org.freedesktop.DBus", arg0=KDEConnectDBus.BUS_NAME
+        )
+        # Signals may have been missed while disconnected
+        with self._lock:
+            self._epoch += 1
+            self._stale = True
+        # Off the hot path: the connecting call does not wait for the seed
+        self.resync_in_background()
+
+    def resync_in_background(self):
+        """Start a resync on a separate thread unless one is already under way"""
+        with self._lock:
+            if self._background:
+                return
+            self._background = True
+        threading.Thread(target=self._background_resync, name="device-cache-resync", daemon=True).start()
+
+    def _background_resync(self):
+        try:
+            self.resync()
+        except Exception:
+            # The daemon is not answering; the next read re-syncs in the foreground
+            pass
+        finally:
+            with self._lock:
+                self._background = False
+
+    def resync(self):
+        """Re-read every device from the daemon
+
+        Callers that arrive while a resync is running wait for it, and only
+        start another if it ended stale. Devices that signals changed during
+        the fetch keep the signalled state rather than what the fetch read before it.
+        """
+        generation = self._generation
+        with self._resync_lock:
+            if self._generation != generation and not self._stale:
+                return
+            started = time.monotonic()
+            # Connect before reading the epoch: connecting starts this cache, which bumps it
+            self.kdeconnect.bus
+            with self._lock:
+                epoch = self._epoch
+                self._touched = set()
             try:
-                # Get notification object
-                notif_path = f"{self.DEVICE_PATH_PREFIX}/{device_id}/notifications/{notif_id}"
-                notif_obj = self.bus.get_object(self.BUS_NAME, notif_path)
-                notif_props = dbus.Interface(notif_obj, "org.freedesktop.DBus.Properties")
-
-                # Get all properties
-                notification = {
-                    "id": notif_id,
-                    "app_name": str(notif_props.Get("org.kde.kdeconnect.device.notifications.notification", "appName")),
-                    "title": str(notif_props.Get("org.kde.kdeconnect.device.notifications.notification", "title")),
-                    "text": str(notif_props.Get("org.kde.kdeconnect.device.notifications.notification", "text")),
-                    "ticker": str(notif_props.Get("org.kde.kdeconnect.device.notifications.notification", "ticker")),
-                    "dismissable": bool(notif_props.Get("org.kde.kdeconnect.device.notifications.notification", "dismissable")),
-                    "has_icon": bool(notif_props.Get("org.kde.kdeconnect.device.notifications.notification", "hasIcon")),
-                    "silent": bool(notif_props.Get("org.kde.kdeconnect.device.notifications.notification", "silent"))
+                device_ids = self.kdeconnect.list_devices(reachable_only=False, paired_only=False)
+                devices = {str(device_id): self._fetch(str(device_id)) for device_id in device_ids}
+                with self._lock:
+                    for device_id in self._touched:
+                        if device_id in self._devices:
+                            devices[device_id] = self._devices[device_id]
+                        else:
+                            devices.pop(device_id, None)
+                    self._devices = devices
+                    self._synced_at = started
+                    # A daemon restart during the fetch leaves the cache stale
+                    self._stale = self._epoch != epoch
+                    self._generation += 1
+            finally:
+                with self._lock:
+                    self._touched = None
+
+    def is_stale(self) -> bool:
+        """Whether cached data can no longer be trusted to be current"""
+        if self._stale or self._loop_thread is None or not self._loop_thread.is_alive():
+            return True
+        return time.monotonic() - self._synced_at > self.max_age
+
+    def devices(self, reachable_only: bool = True, paired_only: bool = True) -> List[Dict[str, Any]]:
+        """Return device information, re-syncing first if the cache is stale"""
+        if self.is_stale():
+            self.resync()
+        with self._lock:
+            devices = [copy.copy(info) for info in self._devices.values()]
+        return [
+            info for info in devices
+            if "error" in info or (
+                (info["is_reachable"] or not reachable_only) and (info["is_paired"] or not paired_only)
+            )
+        ]
+
+    def reachable(self, device_id: str) -> Optional[bool]:
+        """Whether device_id is reachable, from signals alone; None when not known
+
+        Never touches D-Bus, so it can gate every call. The answer only depends
+        on signals still being delivered: it is None for unknown devices, until
+        the cache is seeded, after the daemon went away and while the main loop
+        is down. Data older than max_age is re-synced in the background while
+        the answer keeps coming from signals.
+        """
+        if self._stale or self._loop_thread is None or not self._loop_thread.is_alive():
+            return None
+        if time.monotonic() - self._synced_at > self.max_age:
+            self.resync_in_background()
+        with self._lock:
+            info = self._devices.get(device_id)
+            if info is None or "error" in info:
+                return None
+            return info.is_reachable
+
+    def _fetch(self, device_id: str) -> Dict[str, Any]:
+        try:
+            return self.kdeconnect.get_device_info(device_id)
+        except Exception as e:
+            return {"id": device_id, "error": str(e)}
+
+    def _touch(self, device_id: str):
+        # Called with _lock held
+        if self._touched is not None:
+            self._touched.add(device_id)
+
+    def _store(self, device_id: str, info: Dict[str, Any], replace_only: bool = False):
+        with self._lock:
+            if replace_only and device_id not in self._devices:
+                return
+            self._touch(device_id)
+            self._devices[device_id] = info
+
+    def _on_device_added(self, device_id):
+        device_id = str(device_id)
+        props = self.kdeconnect.proxies.interface(f"{DEVICE_PATH_PREFIX}/{device_id}", PROPERTIES_IFACE)
+        props.GetAll(
+            DEVICE_IFACE,
+            reply_handler=lambda values: self._store(device_id, KDEConnectDBus._device_info(device_id, values)),
+            # A device removed in the meantime must not come back as an error entry
+            error_handler=lambda error: self._store(device_id, {"id": device_id, "error": str(error)}, True)
+        )
+
+    def _on_device_removed(self, device_id):
+        with self._lock:
+            self._touch(str(device_id))
+            self._devices.pop(str(device_id), None)
+
+    def _on_visibility_changed(self, device_id, is_visible):
+        with self._lock:
+            info = self._devices.get(str(device_id))
+            if info is not None and "error" not in info:
+                self._touch(str(device_id))
+                info.is_reachable = bool(is_visible)
+                return
+        self._on_device_added(device_id)
+
+    def _on_properties_changed(self, interface, changed, invalidated, path=None):
+        device_id = device_id_from_path(path)
+        if not device_id or str(interface) != DEVICE_IFACE:
+            return
+        if invalidated:
+            self._on_device_added(device_id)
+            return
+        fields = {"name": ("name", str), "type": ("type", str),
+                  "isPaired": ("is_paired", bool), "isReachable": ("is_reachable", bool)}
+        with self._lock:
+            info = self._devices.get(device_id)
+            if info is None or "error" in info:
+                info = None
+            else:
+                self._touch(device_id)
+                for prop, value in changed.items():
+                    if str(prop) in fields:
+                        key, convert = fields[str(prop)]
+                        setattr(info, key, convert(value))
+        if info is None:
+            self._on_device_added(device_id)
+
+    def _on_device_signal(self, *args, path=None, member=None):
+        device_id = device_id_from_path(path)
+        if not device_id:
+            return
+        if member == "reachableChanged" and args:
+            with self._lock:
+                info = self._devices.get(device_id)
+                if info is not None and "error" not in info:
+                    self._touch(device_id)
+                    info.is_reachable = bool(args[0])
+                    return
+        self._on_device_added(device_id)
+
+    def _on_name_owner_changed(self, name, old_owner, new_owner):
+        # The daemon restarted or went away: every cached device is suspect
+        with self._lock:
+            self._epoch += 1
+            self._stale = True
+        if new_owner:
+            # A new daemon is up: re-seed now rather than on the next read
+            self.resync_in_background()
+
+
+class NotificationStore:
+    """Per-device notifications kept current from the notifications plugin's signals
+
+    A device is read in full the first time it is queried; after that
+    notificationPosted / notificationUpdated fetch just the affected
+    notification, and notificationRemoved / allNotificationsRemoved leave
+    tombstones. Every change is stamped with a global sequence number, which
+    clients pass back as `since` to receive only what changed after it.
+    Signals that arrive while a device is being read in full are buffered
+    and replayed on top of the result.
+    """
+
+    def __init__(self, kdeconnect: KDEConnectDBus, max_tombstones: int = 1000):
+        self.kdeconnect = kdeconnect
+        self.max_tombstones = max_tombstones
+        self._lock = threading.Lock()
+        self._seq = 0
+        # device_id -> {"items": {id: notification}, "log": OrderedDict(id -> (seq, removed)),
+        #               "tombstones": int, "horizon": seq}
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        # device_id -> {"syncs": full reads in progress, "events": [(handler, args), ...]}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._loop_thread: threading.Thread = None
+
+    def start(self, loop_thread: threading.Thread):
+        """Subscribe to the notifications plugin's signals on every device"""
+        self._loop_thread = loop_thread
+        with self._lock:
+            self._devices.clear()
+            self._pending.clear()
+        bus = self.kdeconnect.bus
+        for signal_name, handler in (
+            ("notificationPosted", self._on_posted),
+            ("notificationUpdated", self._on_posted),
+            ("notificationRemoved", self._on_removed),
+            ("allNotificationsRemoved", self._on_all_removed),
+        ):
+            bus.add_signal_receiver(
+                handler, signal_name=signal_name, dbus_interface=NOTIFICATIONS_IFACE,
+                bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path"
+            )
+        bus.add_signal_receiver(
+            self._on_name_owner_changed, signal_name="NameOwnerChanged",
+            dbus_interface="org.freedesktop.DBus", arg0=KDEConnectDBus.BUS_NAME
+        )
+
+    def query(self, device_id: str, since: Optional[int] = None) -> Dict[str, Any]:
+        """Return notifications changed after cursor `since`, or all of them
+
+        The result holds the changed (or all) notifications, the ids removed
+        since the cursor, the new cursor, and whether it is a full listing.
+        A full listing is returned when `since` is omitted or predates what
+        the store still remembers for this device.
+        """
+        if self._loop_thread is None or not self._loop_thread.is_alive():
+            # Without the main loop no signals arrive, so never trust stored state
+            self._sync(device_id)
+        elif device_id not in self._devices:
+            self._sync(device_id)
+
+        with self._lock:
+            state = self._devices[device_id]
+            cursor = self._seq
+            if since is None or since < state["horizon"]:
+                return {
+                    "notifications": list(state["items"].values()),
+                    "removed": [],
+                    "cursor": cursor,
+                    "full": True
                 }
 
-                # Try to get replyId if available
-                try:
-                    notification["reply_id"] = str(notif_props.Get("org.kde.kdeconnect.device.notifications.notification", "replyId"))
-                except:
-                    notification["reply_id"] = ""
+            changed, removed = [], []
+            log = state["log"]
+            for notif_id in reversed(log):
+                seq, gone = log[notif_id]
+                if seq <= since:
+                    break
+                if gone:
+                    removed.append(notif_id)
+                else:
+                    changed.append(state["items"][notif_id])
+
+        changed.reverse()
+        removed.reverse()
+        return {"notifications": changed, "removed": removed, "cursor": cursor, "full": False}
+
+    def notifications(self, device_id: str) -> List[Dict[str, Any]]:
+        """Return every active notification of a device"""
+        return self.query(device_id)["notifications"]
+
+    def _sync(self, device_id: str):
+        with self._lock:
+            pending = self._pending.setdefault(device_id, {"syncs": 0, "events": []})
+            pending["syncs"] += 1
+        try:
+            notifications = self.kdeconnect.get_notifications(device_id)
+            with self._lock:
+                self._seq += 1
+                state = {
+                    "items": {n["id"]: n for n in notifications},
+                    "log": OrderedDict((n["id"], (self._seq, False)) for n in notifications),
+                    "tombstones": 0,
+                    "horizon": self._seq
+                }
+                self._devices[device_id] = state
+                # Every buffered event may postdate what this read saw
+                for apply, args in pending["events"]:
+                    apply(state, *args)
+        finally:
+            with self._lock:
+                pending["syncs"] -= 1
+                if not pending["syncs"] and self._pending.get(device_id) is pending:
+                    del self._pending[device_id]
+
+    def _dispatch(self, device_id: str, apply, *args):
+        """Apply a change to a device's state, or buffer it while the device is being read"""
+        with self._lock:
+            pending = self._pending.get(device_id)
+            if pending is not None:
+                pending["events"].append((apply, args))
+            state = self._devices.get(device_id)
+            if state is not None:
+                apply(state, *args)
+
+    def _on_posted(self, notif_id, path=None):
+        device_id = device_id_from_path(path, "/notifications")
+        notif_id = str(notif_id)
+        if device_id not in self._devices and device_id not in self._pending:
+            return
+        # Asynchronous, as this runs on the main loop
+        self.kdeconnect.proxies.interface(f"{path}/{notif_id}", PROPERTIES_IFACE).GetAll(
+            NOTIFICATION_IFACE,
+            reply_handler=lambda props: self._dispatch(
+                device_id, self._apply_posted, KDEConnectDBus._notification(notif_id, props)
+            ),
+            # Gone already; notificationRemoved follows
+            error_handler=lambda error: None
+        )
 
-                notifications.append(notification)
-            except Exception as e:
-                notifications.append({
-                    "id": notif_id,
-                    "error": str(e)
+    def _on_removed(self, notif_id, path=None):
+        self._dispatch(device_id_from_path(path, "/notifications"), self._apply_removed, str(notif_id))
+
+    def _on_all_removed(self, path=None):
+        self._dispatch(device_id_from_path(path, "/notifications"), self._apply_all_removed)
+
+    def _apply_posted(self, state: Dict[str, Any], notification: Notification):
+        self._seq += 1
+        state["items"][notification.id] = notification
+        self._log(state, notification.id, removed=False)
+
+    def _apply_removed(self, state: Dict[str, Any], notif_id: str):
+        if state["items"].pop(notif_id, None) is None:
+            return
+        self._seq += 1
+        self._log(state, notif_id, removed=True)
+        self._trim(state)
+
+    def _apply_all_removed(self, state: Dict[str, Any]):
+        if not state["items"]:
+            return
+        self._seq += 1
+        for notif_id in list(state["items"]):
+            self._log(state, notif_id, removed=True)
+        state["items"].clear()
+        self._trim(state)
+
+    def _log(self, state: Dict[str, Any], notif_id: str, removed: bool):
+        previous = state["log"].pop(notif_id, None)
+        if previous is not None and previous[1]:
+            state["tombstones"] -= 1
+        state["log"][notif_id] = (self._seq, removed)
+        if removed:
+            state["tombstones"] += 1
+
+    def _trim(self, state: Dict[str, Any]):
+        """Forget the oldest tombstones; cursors older than them get a full listing"""
+        log = state["log"]
+        for notif_id in list(log):
+            if state["tombstones"] <= self.max_tombstones:
+                break
+            seq, gone = log[notif_id]
+            if gone:
+                del log[notif_id]
+                state["tombstones"] -= 1
+                state["horizon"] = seq
+
+    def _on_name_owner_changed(self, name, old_owner, new_owner):
+        with self._lock:
+            self._devices.clear()
+            for pending in self._pending.values():
+                pending["events"].clear()
+
+
+class BatteryHistory:
+    """Per-device battery history in fixed-size ring buffers, persisted to disk
+
+    Samples come from the battery plugin's refreshed / PropertiesChanged
+    signals and from get_battery calls. A sample identical to the previous
+    one is dropped unless min_interval seconds have passed, so a device
+    produces at most a few hundred samples a day and the default capacity
+    of 65536 holds months of history. Each device's samples are appended to
+    <directory>/<device_id>.bin as 6-byte records (uint32 time, int8 charge,
+    uint8 charging), and the file is compacted to the last `capacity` records
+    when it grows past twice that. Samples from signals are written by a
+    worker thread, so the main loop never waits on the disk.
+    """
+
+    RECORD = struct.Struct("<IbB")
+
+    def __init__(self, kdeconnect: KDEConnectDBus, directory: str = None, capacity: int = 65536,
+                 min_interval: float = 300.0):
+        self.kdeconnect = kdeconnect
+        self.directory = directory or os.path.join(
+            os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share")), "kdeconnect-mcp", "battery"
+        )
+        self.capacity = capacity
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        # device_id -> {"times": array("I"), "charges": array("b"), "charging": array("B"),
+        #               "head": next write index, "count": int, "file_records": int}
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        # One thread, so samples from signals are written in the order they arrived
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="battery-history")
+
+    def start(self, loop_thread: threading.Thread):
+        """Record samples from the battery plugin's signals"""
+        bus = self.kdeconnect.bus
+        bus.add_signal_receiver(
+            self._on_refreshed, signal_name="refreshed", dbus_interface=BATTERY_IFACE,
+            bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path"
+        )
+        add_properties_receiver(bus, self._on_properties_changed, BATTERY_IFACE)
+
+    def record(self, device_id: str, charge: int, is_charging: bool, at: float = None):
+        """Add a sample; returns without storing it if nothing changed recently"""
+        at = int(time.time() if at is None else at)
+        charge = max(-1, min(100, int(charge)))
+        with self._lock:
+            ring = self._ring(device_id)
+            if ring["count"]:
+                last = (ring["head"] - 1) % self.capacity
+                if (ring["charges"][last] == charge and ring["charging"][last] == bool(is_charging)
+                        and at - ring["times"][last] < self.min_interval):
+                    return
+            head = ring["head"]
+            ring["times"][head] = at
+            ring["charges"][head] = charge
+            ring["charging"][head] = bool(is_charging)
+            ring["head"] = (head + 1) % self.capacity
+            ring["count"] = min(ring["count"] + 1, self.capacity)
+            self._append(device_id, ring, self.RECORD.pack(at, charge, bool(is_charging)))
+
+    def samples(self, device_id: str, since: float = 0) -> List[tuple]:
+        """Return (time, charge, is_charging) samples newer than since, oldest first"""
+        with self._lock:
+            ring = self._ring(device_id)
+            count, head = ring["count"], ring["head"]
+            start = (head - count) % self.capacity
+            order = [(start + i) % self.capacity for i in range(count)]
+            times, charges, charging = ring["times"], ring["charges"], ring["charging"]
+            # Times are increasing, so skip straight to the first one in range
+            first = bisect.bisect_left([times[i] for i in order], since)
+            return [(times[i], charges[i], bool(charging[i])) for i in order[first:]]
+
+    def summary(self, device_id: str, hours: float = 24.0, points: int = 48) -> Dict[str, Any]:
+        """Downsampled charge series over the last `hours` plus drain / charge rate estimates"""
+        now = time.time()
+        samples = self.samples(device_id, now - hours * 3600)
+        series = []
+        if samples:
+            width = hours * 3600 / max(1, points)
+            buckets: Dict[int, List[tuple]] = {}
+            for sample in samples:
+                buckets.setdefault(int((sample[0] - (now - hours * 3600)) // width), []).append(sample)
+            for index in sorted(buckets):
+                bucket = buckets[index]
+                series.append({
+                    "time": bucket[-1][0],
+                    "charge": round(sum(s[1] for s in bucket) / len(bucket), 1),
+                    "is_charging": bucket[-1][2]
                 })
 
-        return notifications
+        result = {
+            "device_id": device_id,
+            "hours": hours,
+            "samples": len(samples),
+            "series": series,
+            "current": None,
+            "rate_per_hour": None,
+            "time_to_empty_hours": None,
+            "time_to_full_hours": None
+        }
+        if not samples:
+            return result
+
+        current_time, current_charge, charging = samples[-1]
+        result["current"] = {"time": current_time, "charge": current_charge, "is_charging": charging}
+        # Rate over the trailing run with the current charging state, also cut
+        # where the charge moved the wrong way (a charge the flag did not show)
+        run = [samples[-1]]
+        for sample in reversed(samples[:-1]):
+            newer = run[-1][1]
+            if sample[2] != charging or (sample[1] < newer - 1 if not charging else sample[1] > newer + 1):
+                break
+            run.append(sample)
+        rate = self._slope_per_hour(run)
+        result["rate_per_hour"] = None if rate is None else round(rate, 2)
+        if rate is not None and rate < 0 and not charging:
+            result["time_to_empty_hours"] = round(current_charge / -rate, 1)
+        elif rate is not None and rate > 0 and charging:
+            result["time_to_full_hours"] = round((100 - current_charge) / rate, 1)
+        return result
+
+    @staticmethod
+    def _slope_per_hour(samples: List[tuple]) -> Optional[float]:
+        """Least-squares charge change per hour, or None with too little data"""
+        if len(samples) < 2 or abs(samples[0][0] - samples[-1][0]) < 600:
+            return None
+        n = len(samples)
+        mean_t = sum(s[0] for s in samples) / n
+        mean_c = sum(s[1] for s in samples) / n
+        var = sum((s[0] - mean_t) ** 2 for s in samples)
+        cov = sum((s[0] - mean_t) * (s[1] - mean_c) for s in samples)
+        return cov / var * 3600 if var else None
+
+    def _path(self, device_id: str) -> str:
+        safe = "".join(c for c in device_id if c.isalnum() or c in "-_")
+        if safe != device_id or not safe:
+            safe = hashlib.sha256(device_id.encode()).hexdigest()
+        return os.path.join(self.directory, safe + ".bin")
+
+    def _ring(self, device_id: str) -> Dict[str, Any]:
+        """Return the device's ring buffer, loading it from disk the first time"""
+        ring = self._devices.get(device_id)
+        if ring is not None:
+            return ring
+        ring = {
+            "times": array.array("I", bytes(4 * self.capacity)),
+            "charges": array.array("b", bytes(self.capacity)),
+            "charging": array.array("B", bytes(self.capacity)),
+            "head": 0, "count": 0, "file_records": 0
+        }
+        size = self.RECORD.size
+        try:
+            with open(self._path(device_id), "rb") as f:
+                total = os.fstat(f.fileno()).st_size // size
+                keep = min(total, self.capacity)
+                f.seek((total - keep) * size)
+                data = f.read(keep * size)
+            for i, (at, charge, charging) in enumerate(self.RECORD.iter_unpack(data[:keep * size])):
+                ring["times"][i], ring["charges"][i], ring["charging"][i] = at, charge, charging
+            ring["head"] = keep % self.capacity
+            ring["count"] = keep
+            ring["file_records"] = total
+        except FileNotFoundError:
+            pass
+        self._devices[device_id] = ring
+        return ring
+
+    def _append(self, device_id: str, ring: Dict[str, Any], record: bytes):
+        path = self._path(device_id)
+        try:
+            if ring["file_records"] >= 2 * self.capacity:
+                # Compact: rewrite just what the ring holds (which includes this record)
+                count, head = ring["count"], ring["head"]
+                start = (head - count) % self.capacity
+                data = b"".join(
+                    self.RECORD.pack(ring["times"][j], ring["charges"][j], ring["charging"][j])
+                    for j in ((start + i) % self.capacity for i in range(count))
+                )
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                ring["file_records"] = count
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "ab") as f:
+                f.write(record)
+            ring["file_records"] += 1
+        except OSError:
+            # History still works from memory; persistence is best effort
+            pass
+
+    def _record_later(self, device_id: str, charge: int, is_charging: bool):
+        """record() from a signal handler: it reads and appends files, so not on the main loop"""
+        self._writer.submit(self.record, device_id, charge, is_charging, time.time())
+
+    def _on_refreshed(self, is_charging, charge, path=None):
+        device_id = device_id_from_path(path, "/battery")
+        if device_id:
+            self._record_later(device_id, int(charge), bool(is_charging))
+
+    def _on_properties_changed(self, interface, changed, invalidated, path=None):
+        if str(interface) != BATTERY_IFACE:
+            return
+        device_id = device_id_from_path(path, "/battery")
+        if not device_id:
+            return
+        if "charge" in changed and "isCharging" in changed:
+            self._record_later(device_id, int(changed["charge"]), bool(changed["isCharging"]))
+            return
+        # Partial change: fetch both without blocking the main loop
+        self.kdeconnect._get_properties(device_id, "battery").GetAll(
+            BATTERY_IFACE,
+            reply_handler=lambda props: self._record_later(
+                device_id, int(props["charge"]), bool(props["isCharging"])
+            ),
+            error_handler=lambda error: None
+        )
+
+
+class LazyKDEConnectDBus:
+    """KDEConnectDBus stand-in that connects to D-Bus on first use
+
+    Nothing touches the bus until a tool actually needs kdeconnectd, so the
+    server answers initialize and tools/list immediately, even when kdeconnectd
+    (or the session bus) is not up yet. Attribute access is forwarded to the
+    live KDEConnectDBus. After reset() the next access opens a fresh
+    connection and re-runs the on_connect callbacks that wire up the caches.
+    """
+
+    # Errors that mean the bus connection itself is gone
+    RECONNECT_ERRORS = {
+        "org.freedesktop.DBus.Error.Disconnected",
+        "org.freedesktop.DBus.Error.NoServer",
+    }
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._instance: KDEConnectDBus = None
+        self._loop_thread: threading.Thread = None
+        self._on_connect = []
+
+    def on_connect(self, callback):
+        """Register callback(loop_thread), run after every (re)connection"""
+        self._on_connect.append(callback)
+
+    @property
+    def connected(self) -> bool:
+        return self._instance is not None
+
+    def connect(self) -> KDEConnectDBus:
+        """Return the live KDEConnectDBus, connecting if needed"""
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                if self._loop_thread is None or not self._loop_thread.is_alive():
+                    self._loop_thread = start_main_loop()
+                self._instance = KDEConnectDBus()
+                for callback in self._on_connect:
+                    callback(self._loop_thread)
+            return self._instance
+
+    def reset(self):
+        """Drop the current connection; the next use reconnects"""
+        with self._lock:
+            instance, self._instance = self._instance, None
+        if instance is not None:
+            try:
+                instance.bus.close()
+            except Exception:
+                pass
+
+    def __getattr__(self, name: str):
+        return getattr(self.connect(), name)
+
+
+class AsyncKDEConnectDBus:
+    """Asyncio facade over KDEConnectDBus
+
+    dbus-python only offers blocking calls, so every KDEConnectDBus method is
+    exposed as a coroutine that runs on a worker thread. The event loop stays
+    free while a device is slow to answer, and calls against different
+    devices overlap instead of queueing behind each other. When the wrapped
+    object is a LazyKDEConnectDBus, the connection is opened on the worker
+    thread, and a call that fails because the bus went away is retried once
+    on a new connection.
+    """
+
+    def __init__(self, kdeconnect: KDEConnectDBus, max_workers: int = 32):
+        self.kdeconnect = kdeconnect
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kdeconnect")
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking callable on the worker pool, keeping the caller's context"""
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        except dbus.exceptions.DBusException as e:
+            lazy = self.kdeconnect
+            if not isinstance(lazy, LazyKDEConnectDBus) or e.get_dbus_name() not in lazy.RECONNECT_ERRORS:
+                raise
+            lazy.reset()
+            return await loop.run_in_executor(self._executor, call)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting calls and, by default, wait for running ones to finish"""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __getattr__(self, name: str):
+        method = getattr(KDEConnectDBus, name, None)
+        if name.startswith("_") or not callable(method):
+            raise AttributeError(name)
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            # Resolved on the worker thread, where connecting may block
+            return await self.run(lambda: getattr(self.kdeconnect, name)(*args, **kwargs))
+
+        return call
+
+
+class TransferManager:
+    """Queue of outgoing file transfers with a concurrency limit
+
+    Files are grouped into batches of up to max_batch_files, each sent with one
+    shareUrls call, and at most max_concurrent batches are in flight at once.
+    Every batch is tracked as a transfer (queued -> sending -> submitted or
+    failed), and the most recent `history` transfers stay queryable.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_batch_files: int = 50, history: int = 100):
+        self.max_concurrent = max_concurrent
+        self.max_batch_files = max_batch_files
+        self.history = history
+        self._semaphore: asyncio.Semaphore = None
+        self._transfers: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+
+    async def share(self, device_id: str, file_paths: List[str], progress=None) -> Dict[str, Any]:
+        """Send files to a device, calling `await progress(done_bytes, total_bytes)` per batch"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        batches = [
+            file_paths[i:i + self.max_batch_files]
+            for i in range(0, len(file_paths), self.max_batch_files)
+        ]
+        transfers = [self._new_transfer(device_id, batch) for batch in batches]
+        total_bytes = sum(t["bytes"] for t in transfers)
+        done = {"bytes": 0}
+
+        async def send(transfer: Dict[str, Any]):
+            async with self._semaphore:
+                transfer["state"] = "sending"
+                transfer["started_at"] = time.time()
+                try:
+                    await async_kdeconnect.share_files(device_id, transfer["files"])
+                    transfer["state"] = "submitted"
+                except Exception as e:
+                    transfer["state"] = "failed"
+                    transfer["error"] = str(e)
+                transfer["finished_at"] = time.time()
+            done["bytes"] += transfer["bytes"]
+            if progress is not None:
+                await progress(done["bytes"], total_bytes)
+
+        await asyncio.gather(*(send(t) for t in transfers))
+        return {
+            "transfers": [dict(t) for t in transfers],
+            "files": len(file_paths),
+            "bytes": total_bytes,
+            "failed": sum(1 for t in transfers if t["state"] == "failed")
+        }
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Return the tracked transfers, oldest first"""
+        return [dict(t) for t in self._transfers.values()]
+
+    def _new_transfer(self, device_id: str, files: List[str]) -> Dict[str, Any]:
+        self._next_id += 1
+        transfer = {
+            "id": self._next_id,
+            "device_id": device_id,
+            "files": files,
+            "bytes": sum(os.path.getsize(f) for f in files),
+            "state": "queued",
+            "queued_at": time.time()
+        }
+        self._transfers[transfer["id"]] = transfer
+        while len(self._transfers) > self.history:
+            self._transfers.popitem(last=False)
+        return transfer
+
+
+class MediaCommandQueue:
+    """Per-device queue running media command sequences, coalesced and pipelined
+
+    A sequence may start by selecting a player and then lists actions. Runs
+    of play-state actions are reduced to their net effect (Play, Pause, Play
+    is just Play; PlayPause twice is nothing) and repeated player selections
+    to the last one; Next and Previous are always kept. Sequences for one
+    device run one at a time, and at most max_in_flight commands are
+    unanswered at once so the phone is not flooded.
+    """
+
+    STATE_ACTIONS = {"Play", "Pause", "PlayPause", "Stop"}
+
+    def __init__(self, kdeconnect: KDEConnectDBus, max_in_flight: int = 4, max_length: int = 32):
+        self.kdeconnect = kdeconnect
+        self.max_in_flight = max_in_flight
+        self.max_length = max_length
+        self._lock = threading.Lock()
+        self._device_locks: Dict[str, threading.Lock] = {}
+
+    @classmethod
+    def coalesce(cls, commands: List[tuple]) -> List[tuple]:
+        """Drop commands whose effect is overridden later in the sequence"""
+        result, run = [], []
+
+        def flush():
+            result.extend(cls._net_state(run))
+            run.clear()
+
+        for kind, value in commands:
+            if kind == "action" and value in cls.STATE_ACTIONS:
+                run.append(value)
+                continue
+            flush()
+            if kind == "player" and result and result[-1][0] == "player":
+                result[-1] = (kind, value)
+            else:
+                result.append((kind, value))
+        flush()
+        return result
+
+    @staticmethod
+    def _net_state(run: List[str]) -> List[tuple]:
+        absolute = [i for i, action in enumerate(run) if action != "PlayPause"]
+        toggles = len(run) - (absolute[-1] + 1 if absolute else 0)
+        if not absolute:
+            return [("action", "PlayPause")] if toggles % 2 else []
+        base = run[absolute[-1]]
+        if toggles % 2 == 0:
+            return [("action", base)]
+        if base in ("Play", "Pause"):
+            return [("action", "Pause" if base == "Play" else "Play")]
+        return [("action", "Stop"), ("action", "PlayPause")]
+
+    def run(self, device_id: str, actions: List[str], player: Optional[str] = None) -> Dict[str, Any]:
+        """Coalesce and send a sequence; blocks until the phone has answered every command"""
+        commands = ([("player", player)] if player else []) + [("action", a) for a in actions]
+        if len(commands) > self.max_length:
+            raise ValueError(f"At most {self.max_length} commands per sequence, got {len(commands)}")
+        coalesced = self.coalesce(commands)
+
+        with self._lock:
+            device_lock = self._device_locks.setdefault(device_id, threading.Lock())
+        with device_lock:
+            self.kdeconnect.send_media_commands(device_id, coalesced, self.max_in_flight)
+
+        return {
+            "status": "success",
+            "requested": len(commands),
+            "sent": [value if kind == "action" else f"player:{value}" for kind, value in coalesced],
+            "coalesced": len(commands) - len(coalesced)
+        }
 
 
-# Initialize KDE Connect interface
-kdeconnect = KDEConnectDBus()
+class ResourceSubscriptions:
+    """MCP resources/subscribe support driven by kdeconnect D-Bus signals
+
+    Device and mprisremote signals mark the matching resource URI dirty. A
+    dirty URI with subscribers is re-rendered once per debounce window, no
+    matter how many signals arrived in it, and notifications/resources/updated
+    goes out only if the rendered content differs from what was last sent.
+    Until the next signal, reads of a subscribed URI are served from that
+    rendered content without touching D-Bus.
+    """
+
+    DEVICES_URI = "kdeconnect://devices"
+
+    def __init__(self, kdeconnect: KDEConnectDBus, render, debounce: float = 0.25):
+        self.kdeconnect = kdeconnect
+        # render(uri) -> awaitable str, the resource content for a URI
+        self.render = render
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, set] = {}
+        self._content: Dict[str, str] = {}
+        self._version: Dict[str, int] = {}
+        self._clean: Dict[str, int] = {}
+        self._pending = set()
+        self._loop: asyncio.AbstractEventLoop = None
+        self._loop_thread: threading.Thread = None
+
+    def start(self, loop_thread: threading.Thread):
+        """Subscribe to the signals that change subscribable resources"""
+        self._loop_thread = loop_thread
+        bus = self.kdeconnect.bus
+        bus.add_signal_receiver(
+            self._on_daemon_signal, dbus_interface=DAEMON_IFACE, bus_name=KDEConnectDBus.BUS_NAME
+        )
+        bus.add_signal_receiver(
+            self._on_device_signal, dbus_interface=DEVICE_IFACE,
+            bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path"
+        )
+        bus.add_signal_receiver(
+            self._on_mpris_signal, dbus_interface=MPRIS_IFACE,
+            bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path"
+        )
+        add_properties_receiver(bus, self._on_properties_changed, DEVICE_IFACE, MPRIS_IFACE)
+        # Signals may have been missed while disconnected
+        with self._lock:
+            uris = list(self._subscribers)
+        for uri in uris:
+            self.changed(uri)
+
+    async def subscribe(self, uri: str, session):
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(uri, set()).add(session)
+        if uri not in self._content:
+            version = self._version.get(uri, 0)
+            text = await self.render(uri)
+            with self._lock:
+                if uri not in self._content and self._version.get(uri, 0) == version:
+                    self._content[uri] = text
+                    self._clean[uri] = version
+
+    def unsubscribe(self, uri: str, session):
+        with self._lock:
+            sessions = self._subscribers.get(uri)
+            if sessions is not None:
+                sessions.discard(session)
+                if not sessions:
+                    del self._subscribers[uri]
+                    self._content.pop(uri, None)
+                    self._clean.pop(uri, None)
+
+    def cached(self, uri: str) -> Optional[str]:
+        """Rendered content of a subscribed URI, or None if it may be out of date"""
+        if self._loop_thread is None or not self._loop_thread.is_alive():
+            # Without the main loop no signals arrive to say it changed
+            return None
+        with self._lock:
+            if uri in self._subscribers and self._clean.get(uri) == self._version.get(uri, 0):
+                return self._content.get(uri)
+        return None
+
+    def changed(self, uri: str):
+        """Mark uri dirty; safe to call from any thread"""
+        with self._lock:
+            if uri not in self._subscribers:
+                return
+            self._version[uri] = self._version.get(uri, 0) + 1
+            if uri in self._pending or self._loop is None:
+                return
+            self._pending.add(uri)
+            loop = self._loop
+        loop.call_soon_threadsafe(loop.call_later, self.debounce, self._flush, uri)
+
+    def _flush(self, uri: str):
+        asyncio.ensure_future(self._publish(uri))
+
+    async def _publish(self, uri: str):
+        with self._lock:
+            self._pending.discard(uri)
+            version = self._version.get(uri, 0)
+            if uri not in self._subscribers:
+                return
+        try:
+            text = await self.render(uri)
+        except Exception:
+            return
+        with self._lock:
+            updated = text != self._content.get(uri)
+            self._content[uri] = text
+            if self._version.get(uri, 0) == version:
+                self._clean[uri] = version
+            sessions = list(self._subscribers.get(uri, ()))
+        if not updated:
+            return
+        for session in sessions:
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception:
+                # Session is gone
+                self.unsubscribe(uri, session)
+
+    def _on_daemon_signal(self, *args):
+        self.changed(self.DEVICES_URI)
+
+    def _on_device_signal(self, *args, path=None):
+        self.changed(self.DEVICES_URI)
+
+    def _on_mpris_signal(self, *args, path=None):
+        device_id = device_id_from_path(path, "/mprisremote")
+        if device_id:
+            self.changed(f"kdeconnect://{device_id}/now-playing")
+
+    def _on_properties_changed(self, interface, changed, invalidated, path=None):
+        if interface == DEVICE_IFACE:
+            self.changed(self.DEVICES_URI)
+        elif interface == MPRIS_IFACE:
+            self._on_mpris_signal(path=path)
+
+
+class ResponseCache:
+    """Results of read-only tools, keyed on tool name and arguments
+
+    Each cached tool has a TTL and a kind ("battery", "media", "devices",
+    "notifications"); together with the call's device_id that kind tags the
+    entry. kdeconnect signals for a device and our own mutations drop the
+    entries with the matching tag, so within the TTL repeats of a call are
+    answered without touching D-Bus. The least recently used entries are
+    evicted beyond max_entries. Nothing is served while the main loop is not
+    running, as invalidating signals would not arrive, nor while enabled is
+    False.
+    """
+
+    # Plugin interface -> kind of the entries its signals make stale
+    PLUGIN_KINDS = {
+        BATTERY_IFACE: ("battery", "/battery"),
+        MPRIS_IFACE: ("media", "/mprisremote"),
+        NOTIFICATIONS_IFACE: ("notifications", "/notifications"),
+    }
+    _MISSING = object()
+
+    def __init__(self, kdeconnect: KDEConnectDBus, max_entries: int = 256, enabled: bool = True):
+        self.kdeconnect = kdeconnect
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # key -> (expires, tag, value)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Tuple[str, str], Any]]" = OrderedDict()
+        self._tags: Dict[Tuple[str, str], set] = {}
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._loop_thread: threading.Thread = None
+
+    def start(self, loop_thread: threading.Thread):
+        """Subscribe to the signals that make cached results stale"""
+        self._loop_thread = loop_thread
+        self.clear()
+        bus = self.kdeconnect.bus
+        bus.add_signal_receiver(
+            self._on_daemon_signal, dbus_interface=DAEMON_IFACE, bus_name=KDEConnectDBus.BUS_NAME
+        )
+        bus.add_signal_receiver(
+            self._on_device_signal, dbus_interface=DEVICE_IFACE,
+            bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path"
+        )
+        for interface in self.PLUGIN_KINDS:
+            bus.add_signal_receiver(
+                functools.partial(self._on_plugin_signal, interface), dbus_interface=interface,
+                bus_name=KDEConnectDBus.BUS_NAME, path_keyword="path"
+            )
+        add_properties_receiver(bus, self._on_properties_changed, DEVICE_IFACE, *self.PLUGIN_KINDS)
+
+    def cached(self, kind: str, ttl: float):
+        """Decorator for an async read-only tool function"""
+        def decorator(fn):
+            name = fn.__name__
+            signature = inspect.signature(fn)
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await fn(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (name, repr(sorted(bound.arguments.items())))
+                tag = (kind, bound.arguments.get("device_id") or "")
+                value, version = self._lookup(name, key, tag)
+                if value is not self._MISSING:
+                    return value
+                value = await fn(*args, **kwargs)
+                self._store(key, tag, value, ttl, version)
+                return value
+            return wrapper
+        return decorator
+
+    def invalidate(self, kind: str, device_id: str = None):
+        """Drop entries of kind for device_id, or for every device"""
+        with self._lock:
+            tags = [tag for tag in self._versions if tag[0] == kind and device_id in (None, tag[1])]
+            if device_id is not None:
+                tags.append((kind, device_id))
+            for tag in set(tags):
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+                for key in self._tags.pop(tag, ()):
+                    self._entries.pop(key, None)
+                    self._count(key[0], "invalidations")
+
+    def clear(self):
+        with self._lock:
+            for tag in self._versions:
+                self._versions[tag] += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and invalidation counts per tool"""
+        with self._lock:
+            tools = {}
+            for name, counts in sorted(self._stats.items()):
+                lookups = counts["hits"] + counts["misses"]
+                tools[name] = dict(counts, hit_rate=counts["hits"] / lookups if lookups else 0.0)
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "tools": tools}
+
+    def _count(self, name: str, counter: str):
+        counts = self._stats.setdefault(name, {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0})
+        counts[counter] += 1
+
+    def _lookup(self, name: str, key: Tuple[str, str], tag: Tuple[str, str]):
+        live = self._loop_thread is not None and self._loop_thread.is_alive()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and live and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(name, "hits")
+                return entry[2], None
+            self._count(name, "misses")
+            return self._MISSING, self._versions.setdefault(tag, 0)
+
+    def _store(self, key: Tuple[str, str], tag: Tuple[str, str], value: Any, ttl: float, version: int):
+        with self._lock:
+            # A signal during the call may already have made value stale
+            if self._versions.get(tag, 0) != version:
+                return
+            self._entries[key] = (time.monotonic() + ttl, tag, value)
+            self._entries.move_to_end(key)
+            self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (_, old_tag, _) = self._entries.popitem(last=False)
+                self._tags.get(old_tag, set()).discard(old_key)
+                self._count(old_key[0], "evictions")
+
+    def _on_daemon_signal(self, *args):
+        self.invalidate("devices")
+
+    def _on_device_signal(self, *args, path=None):
+        self.invalidate("devices")
+        device_id = device_id_from_path(path)
+        if device_id:
+            # Reachability and pairing change what the plugins can answer
+            for kind, _ in self.PLUGIN_KINDS.values():
+                self.invalidate(kind, device_id)
+
+    def _on_plugin_signal(self, interface, *args, path=None):
+        kind, suffix = self.PLUGIN_KINDS[interface]
+        device_id = device_id_from_path(path, suffix)
+        self.invalidate(kind, device_id or None)
+
+    def _on_properties_changed(self, interface, changed, invalidated, path=None):
+        interface = str(interface)
+        if interface == DEVICE_IFACE:
+            self._on_device_signal(path=path)
+        elif interface in self.PLUGIN_KINDS:
+            self._on_plugin_signal(interface, path=path)
+
+
+# Initialize KDE Connect interface (connects on first tool call)
+kdeconnect = LazyKDEConnectDBus()
+device_cache = DeviceStateCache(kdeconnect)
+notification_store = NotificationStore(kdeconnect)
+now_playing = NowPlayingCache(kdeconnect)
+battery_history = BatteryHistory(kdeconnect)
+kdeconnect.on_connect(scheduler.start)
+scheduler.reachability = device_cache.reachable
+kdeconnect.on_connect(device_cache.start)
+kdeconnect.on_connect(now_playing.start)
+kdeconnect.on_connect(battery_history.start)
+kdeconnect.on_connect(lambda loop_thread: kdeconnect.player_states.start(kdeconnect))
+kdeconnect.on_connect(notification_store.start)
+async_kdeconnect = AsyncKDEConnectDBus(kdeconnect)
+transfers = TransferManager()
+icon_cache = IconCache()
+media_queue = MediaCommandQueue(kdeconnect)
+response_cache = ResponseCache(kdeconnect, enabled=os.environ.get("KDECONNECT_MCP_RESPONSE_CACHE") != "0")
+kdeconnect.on_connect(response_cache.start)
+
+
+class CallOptionsMiddleware(Middleware):
+    """Applies per-call options a client sends in the tools/call _meta
+
+    {"_meta": {"dbusTimeout": 5}} bounds every D-Bus reply made for that
+    call, and its wait for the device's turn, to 5 seconds.
+    """
+
+    MAX_TIMEOUT = 300.0
+
+    async def on_call_tool(self, context, call_next):
+        timeout = self._timeout(context)
+        if timeout is None:
+            return await call_next(context)
+        token = dbus_timeout.set(timeout)
+        try:
+            return await call_next(context)
+        finally:
+            dbus_timeout.reset(token)
+
+    def _timeout(self, context) -> Optional[float]:
+        try:
+            meta = context.fastmcp_context.request_context.meta
+        except (AttributeError, ValueError):
+            return None
+        value = (getattr(meta, "model_extra", None) or {}).get("dbusTimeout")
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value <= self.MAX_TIMEOUT:
+            raise ValueError(f"dbusTimeout must be a number of seconds between 0 and {self.MAX_TIMEOUT:g}")
+        return float(value)
+
 
 # Create FastMCP server
-mcp = FastMCP("KDE Connect MCP Server")
+mcp = FastMCP("KDE Connect MCP Server", tool_serializer=dumps)
+mcp.add_middleware(CallOptionsMiddleware())
+if metrics.enabled:
+    mcp.add_middleware(metrics.middleware())
 
 
 # ========== Tool Definitions ==========
 
 @mcp.tool()
-def list_devices() -> Dict[str, Any]:
+@response_cache.cached("devices", ttl=30.0)
+async def list_devices() -> Dict[str, Any]:
     """
     List all available KDE Connect devices
 
@@ -313,14 +2929,7 @@ def list_devices() -> Dict[str, Any]:
         - devices: List of device information dictionaries
         - count: Total number of devices found
     """
-    devices = kdeconnect.list_devices()
-    device_info = []
-    for device_id in devices:
-        try:
-            info = kdeconnect.get_device_info(device_id)
-            device_info.append(info)
-        except Exception as e:
-            device_info.append({"id": device_id, "error": str(e)})
+    device_info = await async_kdeconnect.run(device_cache.devices)
 
     return {
         "devices": device_info,
@@ -329,7 +2938,8 @@ def list_devices() -> Dict[str, Any]:
 
 
 @mcp.tool()
-def get_battery(device_id: str) -> Dict[str, Any]:
+@response_cache.cached("battery", ttl=60.0)
+async def get_battery(device_id: str) -> Dict[str, Any]:
     """
     Get battery status from a device
 
@@ -341,11 +2951,38 @@ def get_battery(device_id: str) -> Dict[str, Any]:
     Returns:
         Battery information including charge percentage and charging status
     """
-    return kdeconnect.get_battery(device_id)
+    battery = await async_kdeconnect.get_battery(device_id)
+    # Appends to the history file, and loads it on first use: keep it off the event loop
+    await async_kdeconnect.run(battery_history.record, device_id, battery.charge, battery.is_charging)
+    return battery
+
+
+@mcp.tool()
+async def get_battery_history(device_id: str, hours: float = 24.0, points: int = 48) -> Dict[str, Any]:
+    """
+    Get battery charge history and drain rate of a device
+
+    Served from the history recorded in the background (battery signals and
+    earlier get_battery calls), so no device round trip is made.
+
+    Args:
+        device_id: The unique identifier of the KDE Connect device
+        hours: How far back to look (up to 2160, i.e. 90 days)
+        points: Number of points to downsample the series to (1-1000)
+
+    Returns:
+        Downsampled charge series, the latest sample, the charge rate in % per hour
+        over the current charging/discharging run, and time-to-empty/full estimates
+    """
+    if not 0 < hours <= 2160:
+        raise ValueError("hours must be between 0 and 2160")
+    if not 1 <= points <= 1000:
+        raise ValueError("points must be between 1 and 1000")
+    return await async_kdeconnect.run(battery_history.summary, device_id, hours, points)
 
 
 @mcp.tool()
-def get_now_playing(device_id: str) -> Dict[str, Any]:
+async def get_now_playing(device_id: str) -> Dict[str, Any]:
     """
     Get currently playing media information
 
@@ -358,11 +2995,11 @@ def get_now_playing(device_id: str) -> Dict[str, Any]:
     Returns:
         Media information including title, artist, album, playback status, and position
     """
-    return kdeconnect.get_now_playing(device_id)
+    return await async_kdeconnect.run(now_playing.get, device_id)
 
 
 @mcp.tool()
-def media_control(
+async def media_control(
     device_id: str,
     action: Literal["Play", "Pause", "PlayPause", "Next", "Previous", "Stop"]
 ) -> Dict[str, str]:
@@ -378,12 +3015,41 @@ def media_control(
     Returns:
         Status confirmation with the action that was performed
     """
-    kdeconnect.media_control(device_id, action)
+    await async_kdeconnect.media_control(device_id, action)
+    now_playing.invalidate(device_id)
+    response_cache.invalidate("media", device_id)
     return {"status": "success", "action": action}
 
 
 @mcp.tool()
-def send_notification(device_id: str, message: str) -> Dict[str, str]:
+async def media_sequence(
+    device_id: str,
+    actions: List[Literal["Play", "Pause", "PlayPause", "Next", "Previous", "Stop"]],
+    player: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run several media control commands on a device in one call
+
+    Optionally selects a media player first, then sends the actions in order
+    without waiting for each one to complete. Redundant play-state commands
+    are collapsed first (e.g. Play, Pause, Play becomes Play).
+
+    Args:
+        device_id: The unique identifier of the KDE Connect device
+        actions: Media control actions to perform, in order (at most 32 commands)
+        player: Media player to select before the actions (see get_media_players)
+
+    Returns:
+        The commands actually sent and how many were coalesced away
+    """
+    result = await async_kdeconnect.run(media_queue.run, device_id, actions, player)
+    now_playing.invalidate(device_id)
+    response_cache.invalidate("media", device_id)
+    return result
+
+
+@mcp.tool()
+async def send_notification(device_id: str, message: str) -> Dict[str, str]:
     """
     Send a notification to a device
 
@@ -397,12 +3063,12 @@ def send_notification(device_id: str, message: str) -> Dict[str, str]:
     Returns:
         Status confirmation
     """
-    kdeconnect.send_ping(device_id, message)
+    await async_kdeconnect.send_ping(device_id, message)
     return {"status": "sent", "message": message}
 
 
 @mcp.tool()
-def share_url(device_id: str, url: str) -> Dict[str, str]:
+async def share_url(device_id: str, url: str) -> Dict[str, str]:
     """
     Share a URL to a device
 
@@ -415,12 +3081,12 @@ def share_url(device_id: str, url: str) -> Dict[str, str]:
     Returns:
         Status confirmation with the shared URL
     """
-    kdeconnect.share_url(device_id, url)
+    await async_kdeconnect.share_url(device_id, url)
     return {"status": "shared", "url": url}
 
 
 @mcp.tool()
-def share_file(device_id: str, file_path: str) -> Dict[str, str]:
+async def share_file(device_id: str, file_path: str) -> Dict[str, str]:
     """
     Share a file to a device
 
@@ -434,12 +3100,68 @@ def share_file(device_id: str, file_path: str) -> Dict[str, str]:
     Returns:
         Status confirmation with the shared file path
     """
-    kdeconnect.share_file(device_id, file_path)
+    await async_kdeconnect.share_file(device_id, file_path)
     return {"status": "shared", "file": file_path}
 
 
 @mcp.tool()
-def ring_device(device_id: str) -> Dict[str, str]:
+async def share_files(
+    device_id: str,
+    ctx: Context,
+    file_paths: Optional[List[str]] = None,
+    pattern: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Share several files to a device
+
+    Transfer a list of files, or every file matching a glob pattern, to the target
+    device. Files are sent in as few requests as possible, and progress is
+    reported as each batch is handed to KDE Connect.
+
+    Args:
+        device_id: The unique identifier of the KDE Connect device
+        file_paths: Absolute paths of the files to share
+        pattern: Glob pattern selecting files to share (e.g., /home/user/photos/*.jpg)
+
+    Returns:
+        Per-batch transfer status, file and byte totals, and any paths that were skipped
+    """
+    candidates = list(file_paths or [])
+    if pattern:
+        candidates += sorted(glob.glob(os.path.expanduser(pattern), recursive=True))
+
+    files, skipped = [], []
+    for path in dict.fromkeys(candidates):
+        (files if os.path.isfile(path) else skipped).append(path)
+    if not files:
+        return {"status": "nothing_to_share", "skipped": skipped}
+
+    async def progress(done: int, total: int):
+        await ctx.report_progress(progress=done, total=total)
+
+    result = await transfers.share(device_id, files, progress)
+    result["status"] = "failed" if result["failed"] == len(result["transfers"]) else "shared"
+    result["skipped"] = skipped
+    return result
+
+
+@mcp.tool()
+async def list_transfers() -> Dict[str, Any]:
+    """
+    List recent outgoing file transfers
+
+    Shows the file batches sent with share_files and their state: queued, sending,
+    submitted (handed to KDE Connect) or failed.
+
+    Returns:
+        Transfers with their files, byte counts, state and timestamps, and count
+    """
+    items = transfers.list()
+    return {"transfers": items, "count": len(items)}
+
+
+@mcp.tool()
+async def ring_device(device_id: str) -> Dict[str, str]:
     """
     Make a device ring to help locate it
 
@@ -452,12 +3174,13 @@ def ring_device(device_id: str) -> Dict[str, str]:
     Returns:
         Status confirmation
     """
-    kdeconnect.ring_device(device_id)
+    await async_kdeconnect.ring_device(device_id)
     return {"status": "ringing"}
 
 
 @mcp.tool()
-def get_media_players(device_id: str) -> Dict[str, Any]:
+@response_cache.cached("media", ttl=30.0)
+async def get_media_players(device_id: str) -> Dict[str, Any]:
     """
     Get list of available media players on a device
 
@@ -470,8 +3193,10 @@ def get_media_players(device_id: str) -> Dict[str, Any]:
     Returns:
         List of available players, current active player, and count
     """
-    players = kdeconnect.get_media_players(device_id)
-    current = kdeconnect.get_current_player(device_id)
+    players, current = await asyncio.gather(
+        async_kdeconnect.get_media_players(device_id),
+        async_kdeconnect.get_current_player(device_id)
+    )
     return {
         "available_players": players,
         "current_player": current,
@@ -480,7 +3205,7 @@ def get_media_players(device_id: str) -> Dict[str, Any]:
 
 
 @mcp.tool()
-def set_media_player(device_id: str, player: str) -> Dict[str, str]:
+async def set_media_player(device_id: str, player: str) -> Dict[str, str]:
     """
     Set the active media player on a device
 
@@ -494,7 +3219,9 @@ def set_media_player(device_id: str, player: str) -> Dict[str, str]:
     Returns:
         Status confirmation with the selected player
     """
-    kdeconnect.set_media_player(device_id, player)
+    await async_kdeconnect.set_media_player(device_id, player)
+    now_playing.invalidate(device_id)
+    response_cache.invalidate("media", device_id)
     return {
         "status": "player_set",
         "player": player
@@ -502,69 +3229,274 @@ def set_media_player(device_id: str, player: str) -> Dict[str, str]:
 
 
 @mcp.tool()
-def detect_active_player(device_id: str) -> Dict[str, Any]:
+async def detect_active_player(
+    device_id: str,
+    mode: Literal["passive", "sweep"] = "passive"
+) -> Dict[str, Any]:
     """
     Automatically detect which media player is currently playing
 
-    Scans all available media players to find which one is actively playing media.
-    Returns detailed information about each player's state.
+    Finds which media player is actively playing media and returns detailed
+    information about each player's state.
 
     Args:
         device_id: The unique identifier of the KDE Connect device (use list_devices to find device IDs)
+        mode: "passive" (default) reads the selected player live and reports the others
+            from their last-seen state, without switching players on the device.
+            "sweep" switches to every player in turn for a complete, fresh scan; it is
+            slower and visibly changes the player on the device while it runs.
 
     Returns:
         List of active players with their playback status and current media information
     """
-    return kdeconnect.detect_active_player(device_id)
+    return await async_kdeconnect.detect_active_player(device_id, mode)
 
 
 @mcp.tool()
-def get_notifications(device_id: str) -> Dict[str, Any]:
+@response_cache.cached("notifications", ttl=30.0)
+async def get_notifications(device_id: str, since: Optional[int] = None) -> Dict[str, Any]:
     """
-    Get all active notifications from a device
+    Get active notifications from a device
 
-    Retrieves all current notifications on the device, including app name,
-    title, text content, and other metadata.
+    Retrieves current notifications on the device, including app name,
+    title, text content, and other metadata. Pass the cursor from a previous
+    call as `since` to get only what changed after that call.
 
     Args:
         device_id: The unique identifier of the KDE Connect device (use list_devices to find device IDs)
+        since: Cursor returned by an earlier call; omit to get every notification
 
     Returns:
-        List of notifications with full details and count
+        Notifications (all of them, or those posted/updated since the cursor), count,
+        ids removed since the cursor, the new cursor, and whether the listing is full
     """
-    notifications = kdeconnect.get_notifications(device_id)
+    result = await async_kdeconnect.run(notification_store.query, device_id, since)
     return {
-        "notifications": notifications,
-        "count": len(notifications)
+        "notifications": result["notifications"],
+        "count": len(result["notifications"]),
+        "removed": result["removed"],
+        "cursor": result["cursor"],
+        "full": result["full"]
     }
 
 
 @mcp.tool()
-def list_received_files(device_id: str, limit: int = 10) -> Dict[str, Any]:
+async def get_notification_icon(
+    device_id: str,
+    notification_id: str,
+    max_size: int = 128,
+    as_image: bool = True
+):
+    """
+    Get the icon of a notification
+
+    Icons are thumbnailed and kept in an on-disk cache, so icons repeated across
+    notifications of the same app are served without being processed again.
+
+    Args:
+        device_id: The unique identifier of the KDE Connect device
+        notification_id: Notification id as returned by get_notifications
+        max_size: Longest side of the thumbnail in pixels (16-512)
+        as_image: Return MCP image content; set to false for base64 data in JSON
+
+    Returns:
+        The icon as image content, or its mime type, base64 data and content digest
+    """
+    if not 16 <= max_size <= 512:
+        raise ValueError("max_size must be between 16 and 512")
+
+    def read_icon():
+        notification = next(
+            (n for n in notification_store.notifications(device_id) if n["id"] == notification_id),
+            None
+        ) or kdeconnect.get_notification(device_id, notification_id)
+        if "error" in notification:
+            raise ValueError(notification["error"])
+        if not notification.get("icon_path"):
+            raise ValueError(f"Notification {notification_id} has no icon")
+        return icon_cache.get(notification["icon_path"], max_size)
+
+    icon = await async_kdeconnect.run(read_icon)
+    if as_image:
+        return ImageContent(type="image", data=icon["data"], mimeType=icon["mime_type"])
+    return {"notification_id": notification_id, **icon}
+
+
+async def _select_notifications(
+    device_id: str,
+    notification_ids: Optional[List[str]],
+    app_name: Optional[str],
+    title_pattern: Optional[str]
+):
+    """Active notifications matching every given criterion, and requested ids that are not active"""
+    if not notification_ids and app_name is None and title_pattern is None:
+        raise ValueError("Give notification_ids, app_name or title_pattern (use \".\" to match every title)")
+    try:
+        title = re.compile(title_pattern) if title_pattern is not None else None
+    except re.error as e:
+        raise ValueError(f"Invalid title_pattern: {e}")
+
+    notifications = await async_kdeconnect.run(notification_store.notifications, device_id)
+    wanted = set(notification_ids) if notification_ids else None
+    selected = [
+        n for n in notifications
+        if (wanted is None or n["id"] in wanted)
+        and (app_name is None or n.get("app_name", "").casefold() == app_name.casefold())
+        and (title is None or title.search(n.get("title", "")))
+    ]
+    active = {n["id"] for n in notifications}
+    missing = [i for i in dict.fromkeys(notification_ids or ()) if i not in active]
+    return selected, missing
+
+
+async def _act_on_notifications(device_id: str, selected, missing, eligible, skip_status: str,
+                                done_status: str, action: tuple) -> Dict[str, Any]:
+    """Send action to every eligible notification at once and report each one"""
+    targets = [n for n in selected if "error" not in n and eligible(n)]
+    errors = await async_kdeconnect.send_notification_actions(
+        device_id, [(action[0], n["id"], *action[1:]) for n in targets]
+    )
+    outcome = {n["id"]: error for n, error in zip(targets, errors)}
+    response_cache.invalidate("notifications", device_id)
+
+    results = []
+    for n in selected:
+        if "error" in n:
+            results.append({"id": n["id"], "status": "failed", "error": n["error"]})
+        elif n["id"] not in outcome:
+            results.append({"id": n["id"], "status": skip_status})
+        elif outcome[n["id"]] is None:
+            results.append({"id": n["id"], "status": done_status, "app_name": n["app_name"], "title": n["title"]})
+        else:
+            results.append({"id": n["id"], "status": "failed", "error": str(outcome[n["id"]])})
+    results += [{"id": notif_id, "status": "not_found"} for notif_id in missing]
+
+    done = sum(1 for r in results if r["status"] == done_status)
+    failed = sum(1 for r in results if r["status"] == "failed")
+    return {"results": results, done_status: done, "failed": failed, "skipped": len(results) - done - failed}
+
+
+@mcp.tool()
+async def dismiss_notifications(
+    device_id: str,
+    notification_ids: Optional[List[str]] = None,
+    app_name: Optional[str] = None,
+    title_pattern: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Dismiss notifications on a device in one call
+
+    Selects active notifications by id, app name and/or a regular expression
+    searched in the title (a notification must match every criterion given)
+    and dismisses all of them concurrently. Use title_pattern "." to dismiss
+    every notification.
+
+    Args:
+        device_id: The unique identifier of the KDE Connect device
+        notification_ids: Ids as returned by get_notifications
+        app_name: Only notifications from this app (case-insensitive)
+        title_pattern: Regular expression matched against the title
+
+    Returns:
+        Per-notification status (dismissed, failed, not_dismissable, not_found) and totals
+    """
+    selected, missing = await _select_notifications(device_id, notification_ids, app_name, title_pattern)
+    return await _act_on_notifications(
+        device_id, selected, missing, lambda n: n["dismissable"], "not_dismissable", "dismissed", ("dismiss",)
+    )
+
+
+@mcp.tool()
+async def reply_notification(
+    device_id: str,
+    message: str,
+    notification_ids: Optional[List[str]] = None,
+    app_name: Optional[str] = None,
+    title_pattern: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Reply to messaging notifications on a device
+
+    Sends the same reply to every selected notification that supports replies
+    (chat and SMS apps), concurrently. Selection works as in dismiss_notifications.
+
+    Args:
+        device_id: The unique identifier of the KDE Connect device
+        message: The reply text
+        notification_ids: Ids as returned by get_notifications
+        app_name: Only notifications from this app (case-insensitive)
+        title_pattern: Regular expression matched against the title
+
+    Returns:
+        Per-notification status (replied, failed, not_repliable, not_found) and totals
+    """
+    if not message:
+        raise ValueError("message must not be empty")
+    selected, missing = await _select_notifications(device_id, notification_ids, app_name, title_pattern)
+    return await _act_on_notifications(
+        device_id, selected, missing, lambda n: bool(n["reply_id"]), "not_repliable", "replied",
+        ("sendReply", message)
+    )
+
+
+@mcp.tool()
+async def list_received_files(
+    device_id: str,
+    limit: int = 10,
+    pattern: Optional[str] = None,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    modified_after: Optional[float] = None,
+    modified_before: Optional[float] = None
+) -> Dict[str, Any]:
     """
     List recently received files from a device
 
     Shows files that have been transferred from the device to this computer,
-    sorted by most recent first.
+    sorted by most recent first, optionally filtered by name, size and date.
 
     Args:
         device_id: The unique identifier of the KDE Connect device
         limit: Maximum number of files to return (1-100, default: 10)
+        pattern: Shell-style file name pattern (e.g., '*.jpg', 'IMG_2024*')
+        min_size: Only files of at least this many bytes
+        max_size: Only files of at most this many bytes
+        modified_after: Only files modified at or after this Unix timestamp
+        modified_before: Only files modified at or before this Unix timestamp
 
     Returns:
         List of files with paths, sizes, modification times, and download directory
     """
-    files = kdeconnect.list_received_files(device_id, limit)
-    download_dir = kdeconnect.get_download_directory(device_id)
+    catalogue = await async_kdeconnect.received_files_catalogue(device_id)
+    files = await async_kdeconnect.run(
+        catalogue.query, limit, pattern, min_size, max_size, modified_after, modified_before
+    )
     return {
         "files": files,
         "count": len(files),
-        "download_directory": download_dir
+        "download_directory": catalogue.directory
     }
 
 
 @mcp.tool()
-def open_file(file_path: str) -> Dict[str, str]:
+async def get_share_settings(device_id: str) -> Dict[str, Any]:
+    """
+    Get the file sharing settings of a device
+
+    Reads the device's KDE Connect share plugin configuration, such as the
+    directory where files received from the device are saved.
+
+    Args:
+        device_id: The unique identifier of the KDE Connect device
+
+    Returns:
+        The incoming file directory and every raw share plugin setting
+    """
+    return await async_kdeconnect.get_share_settings(device_id)
+
+
+@mcp.tool()
+async def open_file(file_path: str) -> Dict[str, str]:
     """
     Open a file with the default application
 
@@ -577,32 +3509,167 @@ def open_file(file_path: str) -> Dict[str, str]:
     Returns:
         Status confirmation with the opened file path
     """
-    kdeconnect.open_received_file(file_path)
+    await async_kdeconnect.open_received_file(file_path)
     return {
         "status": "opened",
         "file_path": file_path
     }
 
 
+# ========== Multi-Device and Batch Tools ==========
+
+class ToolCall(BaseModel):
+    tool: str = Field(..., description="Name of the tool to call (e.g., 'get_battery')")
+    arguments: Dict[str, Any] = Field(default_factory=dict, description="Arguments for the tool")
+
+
+async def _with_timeout(coro, timeout: float) -> Dict[str, Any]:
+    """Await coro, turning a timeout or failure into an error entry"""
+    try:
+        return {"result": await asyncio.wait_for(coro, timeout)}
+    except asyncio.TimeoutError:
+        return {"error": f"Timed out after {timeout} seconds"}
+    except DeviceUnreachableError as e:
+        return {"error": e.details["message"], "reason": e.reason}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def _fan_out(reader, timeout: float) -> Dict[str, Any]:
+    """Run a blocking per-device reader against every reachable device concurrently"""
+    devices = [d for d in await async_kdeconnect.run(device_cache.devices) if "error" not in d]
+    outcomes = await asyncio.gather(*(
+        _with_timeout(async_kdeconnect.run(reader, d["id"]), timeout) for d in devices
+    ))
+
+    results = [
+        {"device_id": device["id"], "name": device["name"], **outcome}
+        for device, outcome in zip(devices, outcomes)
+    ]
+    return {
+        "results": results,
+        "count": len(results),
+        "failed": sum(1 for r in results if "error" in r)
+    }
+
+
+@mcp.tool()
+async def get_battery_all(timeout: float = 10.0) -> Dict[str, Any]:
+    """
+    Get battery status from every reachable device at once
+
+    Queries all paired and reachable devices concurrently. A device that fails or
+    does not answer within the timeout gets an error entry; the others still return.
+
+    Args:
+        timeout: Seconds to wait for each device (default: 10)
+
+    Returns:
+        Per-device results (device_id, name, and result or error), count and failed count
+    """
+    return await _fan_out(lambda device_id: kdeconnect.get_battery(device_id), timeout)
+
+
+@mcp.tool()
+async def get_now_playing_all(timeout: float = 10.0) -> Dict[str, Any]:
+    """
+    Get currently playing media from every reachable device at once
+
+    Queries all paired and reachable devices concurrently. A device that fails or
+    does not answer within the timeout gets an error entry; the others still return.
+
+    Args:
+        timeout: Seconds to wait for each device (default: 10)
+
+    Returns:
+        Per-device results (device_id, name, and result or error), count and failed count
+    """
+    return await _fan_out(now_playing.get, timeout)
+
+
+@mcp.tool()
+async def get_notifications_all(timeout: float = 10.0) -> Dict[str, Any]:
+    """
+    Get active notifications from every reachable device at once
+
+    Queries all paired and reachable devices concurrently. A device that fails or
+    does not answer within the timeout gets an error entry; the others still return.
+
+    Args:
+        timeout: Seconds to wait for each device (default: 10)
+
+    Returns:
+        Per-device results (device_id, name, and result or error), count and failed count
+    """
+    return await _fan_out(notification_store.notifications, timeout)
+
+
+@mcp.tool()
+async def batch(calls: List[ToolCall], timeout: float = 10.0) -> Dict[str, Any]:
+    """
+    Run several tool calls in one request
+
+    All calls run concurrently; results are returned in the same order as the calls.
+    A call that fails or exceeds the timeout gets an error entry without affecting
+    the others.
+
+    Args:
+        calls: Tool invocations, each with a tool name and its arguments
+            (e.g., [{"tool": "get_battery", "arguments": {"device_id": "..."}}])
+        timeout: Seconds to wait for each call (default: 10)
+
+    Returns:
+        Per-call results (tool, and result or error), count and failed count
+    """
+    async def run_call(client: Client, call: ToolCall):
+        if call.tool == "batch":
+            raise ValueError("batch cannot be nested")
+        result = await client.call_tool_mcp(call.tool, call.arguments)
+        if result.isError:
+            raise ToolError(" ".join(block.text for block in result.content if block.type == "text"))
+        if result.structuredContent is not None:
+            return result.structuredContent
+        # Content-only results, e.g. get_notification_icon's image
+        return [block.model_dump(mode="json", exclude_none=True) for block in result.content]
+
+    # An in-process session, so each call takes the server's full tools/call
+    # path and middleware (call options, metrics) runs for it
+    async with Client(mcp) as client:
+        outcomes = await asyncio.gather(*(_with_timeout(run_call(client, call), timeout) for call in calls))
+    results = [{"tool": call.tool, **outcome} for call, outcome in zip(calls, outcomes)]
+    return {
+        "results": results,
+        "count": len(results),
+        "failed": sum(1 for r in results if "error" in r)
+    }
+
+
 # ========== Resources for Device Information ==========
 
+async def render_resource(uri: str) -> str:
+    """Render a subscribable resource from current D-Bus state"""
+    if uri == ResourceSubscriptions.DEVICES_URI:
+        device_info = await async_kdeconnect.run(device_cache.devices)
+        return dumps({
+            "devices": device_info,
+            "count": len(device_info)
+        })
+    prefix, suffix = "kdeconnect://", "/now-playing"
+    if uri.startswith(prefix) and uri.endswith(suffix):
+        result = await async_kdeconnect.run(now_playing.get, uri[len(prefix):-len(suffix)])
+        return dumps(result)
+    raise ValueError(f"Resource does not support subscriptions: {uri}")
+
+
+subscriptions = ResourceSubscriptions(kdeconnect, render_resource)
+kdeconnect.on_connect(subscriptions.start)
+
+
 @mcp.resource("kdeconnect://devices", name="Device List", description="List of all available KDE Connect devices")
-def devices_resource() -> str:
+async def devices_resource() -> str:
     """Provides a list of all available devices in JSON format."""
-    import json
-    devices = kdeconnect.list_devices()
-    device_info = []
-    for device_id in devices:
-        try:
-            info = kdeconnect.get_device_info(device_id)
-            device_info.append(info)
-        except Exception as e:
-            device_info.append({"id": device_id, "error": str(e)})
-
-    return json.dumps({
-        "devices": device_info,
-        "count": len(device_info)
-    }, indent=2)
+    uri = ResourceSubscriptions.DEVICES_URI
+    return subscriptions.cached(uri) or await render_resource(uri)
 
 
 @mcp.resource(
@@ -610,11 +3677,82 @@ def devices_resource() -> str:
     name="Now Playing Info",
     description="Currently playing media information for a specific device"
 )
-def now_playing_resource(device_id: str) -> str:
+async def now_playing_resource(device_id: str) -> str:
     """Provides now playing information for a device."""
-    import json
-    result = kdeconnect.get_now_playing(device_id)
-    return json.dumps(result, indent=2)
+    uri = f"kdeconnect://{device_id}/now-playing"
+    return subscriptions.cached(uri) or await render_resource(uri)
+
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl):
+    """resources/subscribe: push notifications/resources/updated for uri"""
+    session = mcp._mcp_server.request_context.session
+    # Signals only arrive once connected
+    await async_kdeconnect.run(kdeconnect.connect)
+    await subscriptions.subscribe(str(uri), session)
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl):
+    subscriptions.unsubscribe(str(uri), mcp._mcp_server.request_context.session)
+
+
+def _advertise_subscribe(get_capabilities):
+    # The low-level server always reports subscribe=False, even with handlers registered
+    @functools.wraps(get_capabilities)
+    def wrapper(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+    return wrapper
+
+
+mcp._mcp_server.get_capabilities = _advertise_subscribe(mcp._mcp_server.get_capabilities)
+
+
+@mcp.resource(
+    "kdeconnect://metrics",
+    name="Metrics",
+    description="Call counts, latency histograms, errors and bytes per tool, method and D-Bus call",
+    mime_type="application/json"
+)
+async def metrics_resource() -> str:
+    """Provides instrumentation data, enable with KDECONNECT_MCP_METRICS=1."""
+    return dumps(metrics.snapshot())
+
+
+@mcp.resource(
+    "kdeconnect://metrics/prometheus",
+    name="Metrics (Prometheus)",
+    description="Instrumentation data in the Prometheus text exposition format",
+    mime_type="text/plain"
+)
+async def metrics_prometheus_resource() -> str:
+    """Provides instrumentation data for scraping."""
+    return metrics.prometheus() + scheduler.prometheus()
+
+
+@mcp.resource(
+    "kdeconnect://scheduler",
+    name="Device Scheduler",
+    description="Per-device queue depth, running calls, rejections, wait timeouts and circuit breaker state",
+    mime_type="application/json"
+)
+async def scheduler_resource() -> str:
+    """Provides per-device scheduling state."""
+    return dumps(scheduler.snapshot())
+
+
+@mcp.resource(
+    "kdeconnect://cache",
+    name="Response Cache",
+    description="Entries and per-tool hit, miss, invalidation and eviction counts of the read-only tool cache",
+    mime_type="application/json"
+)
+async def cache_resource() -> str:
+    """Provides response cache statistics."""
+    return dumps(response_cache.stats())
 
 
 # ========== Prompts for Natural Language Interaction ==========
@@ -657,6 +3795,140 @@ def send_message_prompt(
     return f"Send notification to device {device_id}: {message}"
 
 
+# ========== HTTP Serving ==========
+
+class RateLimitMiddleware:
+    """ASGI middleware giving every client its own token bucket
+
+    Clients are told apart by their Mcp-Session-Id header, falling back to
+    the peer address for requests made before a session exists. A client
+    that runs out of tokens gets 429 with Retry-After instead of queueing
+    work in front of everyone else.
+    """
+
+    def __init__(self, app, rate: float, burst: int, max_clients: int = 10000):
+        self.app = app
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # client -> (tokens, last refill time), least recently seen first
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _client(self, scope) -> str:
+        for name, value in scope.get("headers", ()):
+            if name == b"mcp-session-id":
+                return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else ""
+
+    def _take(self, client: str) -> float:
+        """Take one token; return 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.rate <= 0:
+            return await self.app(scope, receive, send)
+        wait = self._take(self._client(scope))
+        if not wait:
+            return await self.app(scope, receive, send)
+
+        body = json.dumps({
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32000, "message": "Rate limit exceeded"}
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, round(wait))).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def serve_http(transport: str = "http", host: str = "127.0.0.1", port: int = 8000,
+               rate_limit: float = 0, burst: int = 20, max_connections: Optional[int] = None,
+               graceful_timeout: float = 10.0):
+    """Serve mcp over streamable HTTP (or SSE) to any number of clients
+
+    Every client shares this process's D-Bus connection and caches. On
+    SIGINT/SIGTERM uvicorn stops accepting connections and waits up to
+    graceful_timeout seconds for requests in flight before the worker pool
+    and the bus are closed.
+    """
+    import uvicorn
+    from starlette.middleware import Middleware
+
+    middleware = []
+    if rate_limit > 0:
+        middleware.append(Middleware(RateLimitMiddleware, rate=rate_limit, burst=burst))
+    app = mcp.http_app(transport=transport, middleware=middleware)
+    server = uvicorn.Server(uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        limit_concurrency=max_connections,
+        timeout_graceful_shutdown=graceful_timeout,
+        log_level="warning"
+    ))
+    try:
+        server.run()
+    finally:
+        async_kdeconnect.shutdown()
+        kdeconnect.reset()
+
+
+def main():
+    import argparse
+
+    global async_kdeconnect
+
+    parser = argparse.ArgumentParser(description="KDE Connect MCP Server")
+    parser.add_argument("--transport", choices=["stdio", "http", "sse"], default="stdio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Threads making D-Bus calls, i.e. tool calls served at once (default 32)")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Requests per second allowed per HTTP client (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=20, help="Requests a client may make at once")
+    parser.add_argument("--max-connections", type=int, default=None,
+                        help="Concurrent HTTP connections before new ones get 503")
+    parser.add_argument("--graceful-timeout", type=float, default=10.0,
+                        help="Seconds to let requests in flight finish on shutdown")
+    parser.add_argument("--now-playing-ttl", type=float, default=now_playing.ttl,
+                        help="Seconds an interpolated now-playing position is trusted without a signal")
+    parser.add_argument("--dbus-timeout", type=float, default=None,
+                        help="Default D-Bus reply timeout in seconds (default: dbus-python's, about 25)")
+    args = parser.parse_args()
+
+    now_playing.ttl = args.now_playing_ttl
+    if args.dbus_timeout:
+        # Copied into every request's context from here
+        dbus_timeout.set(args.dbus_timeout)
+    if args.workers:
+        async_kdeconnect = AsyncKDEConnectDBus(kdeconnect, max_workers=args.workers)
+
+    if args.transport == "stdio":
+        mcp.run()
+    else:
+        serve_http(args.transport, args.host, args.port, args.rate_limit, args.burst,
+                   args.max_connections, args.graceful_timeout)
+
+
 if __name__ == "__main__":
-    # Run the MCP server
-    mcp.run()
+    main()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Mock kdeconnectd - scripted fake org.kde.kdeconnect service for benchmarks
+
+Exports the subset of the KDE Connect D-Bus API used by mcp_server.py
+(daemon, device, battery, mprisremote, notifications, ping, share and
+findmyphone objects) and counts every method call it receives, so the
+number of D-Bus round trips made by the server can be measured offline.
+Replies can be delayed (--latency), notifications replaced on a timer
+(--churn) and batteries drained on a timer (--drain), so the server's
+signal handling is exercised too. Devices made unreachable with --offline
+never answer plugin actions, like a phone that has gone out of range.
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+
+sys.path.append('/usr/lib/python3/dist-packages')
+import dbus
+import dbus.service
+from dbus.mainloop.glib import DBusGMainLoop
+from gi.repository import GLib
+
+
+BUS_NAME = "org.kde.kdeconnect"
+DAEMON_PATH = "/modules/kdeconnect"
+DEVICE_PATH_PREFIX = "/modules/kdeconnect/devices"
+PROPERTIES_IFACE = "org.freedesktop.DBus.Properties"
+MOCK_IFACE = "org.kde.kdeconnect.mock"
+
+# Method call counter shared by every exported object, keyed "Interface.Method"
+CALLS = Counter()
+
+# Simulated round-trip latency in milliseconds, set with --latency
+LATENCY_MS = 0
+
+ASYNC = ("reply", "error")
+
+
+def respond(reply, *values):
+    """Send a method reply, delayed by LATENCY_MS without blocking other callers"""
+    if LATENCY_MS <= 0:
+        reply(*values)
+        return
+
+    def send():
+        reply(*values)
+        return False
+
+    GLib.timeout_add(LATENCY_MS, send)
+
+
+class CountingObject(dbus.service.Object):
+    """Exported object whose introspection requests are counted too"""
+
+    @dbus.service.method(dbus.INTROSPECTABLE_IFACE, in_signature="", out_signature="s",
+                         path_keyword="object_path", connection_keyword="connection")
+    def Introspect(self, object_path, connection):
+        CALLS["Introspectable.Introspect"] += 1
+        return dbus.service.Object.Introspect(self, object_path, connection)
+
+
+class PropertiesObject(CountingObject):
+    """Object exposing one interface's properties through org.freedesktop.DBus.Properties"""
+
+    INTERFACE = ""
+
+    def __init__(self, bus, path: str, props: dict):
+        super().__init__(bus, path)
+        self.path = path
+        self.props = props
+
+    @dbus.service.method(PROPERTIES_IFACE, in_signature="ss", out_signature="v", async_callbacks=ASYNC)
+    def Get(self, interface, name, reply, error):
+        CALLS["Properties.Get"] += 1
+        if interface != self.INTERFACE or name not in self.props:
+            error(dbus.exceptions.DBusException(
+                f"No such property {interface}.{name}",
+                name="org.freedesktop.DBus.Error.InvalidArgs"
+            ))
+            return
+        respond(reply, self.current()[name])
+
+    @dbus.service.method(PROPERTIES_IFACE, in_signature="s", out_signature="a{sv}", async_callbacks=ASYNC)
+    def GetAll(self, interface, reply, error):
+        CALLS["Properties.GetAll"] += 1
+        props = self.current() if interface == self.INTERFACE else {}
+        respond(reply, dbus.Dictionary(props, signature="sv"))
+
+    @dbus.service.method(PROPERTIES_IFACE, in_signature="ssv", async_callbacks=ASYNC)
+    def Set(self, interface, name, value, reply, error):
+        CALLS["Properties.Set"] += 1
+        self.props[name] = value
+        self.on_set(name, value)
+        self.PropertiesChanged(interface, {name: value}, [])
+        respond(reply)
+
+    @dbus.service.signal(PROPERTIES_IFACE, signature="sa{sv}as")
+    def PropertiesChanged(self, interface, changed, invalidated):
+        pass
+
+    def current(self) -> dict:
+        """Property values as of now, for objects whose properties change by themselves"""
+        return self.props
+
+    def on_set(self, name, value):
+        """Hook for objects whose properties depend on each other"""
+
+
+class MockDevice(PropertiesObject):
+    INTERFACE = "org.kde.kdeconnect.device"
+
+    def __init__(self, bus, device_id: str, index: int, reachable: bool = True):
+        super().__init__(bus, f"{DEVICE_PATH_PREFIX}/{device_id}", {
+            "name": dbus.String(f"Mock Phone {index}"),
+            "type": dbus.String("smartphone"),
+            "isPaired": dbus.Boolean(True),
+            "isReachable": dbus.Boolean(reachable),
+        })
+
+    @property
+    def reachable(self) -> bool:
+        return bool(self.props["isReachable"])
+
+    def set_reachable(self, reachable: bool):
+        self.props["isReachable"] = dbus.Boolean(reachable)
+        self.reachableChanged(reachable)
+
+    @dbus.service.signal("org.kde.kdeconnect.device", signature="b")
+    def reachableChanged(self, reachable):
+        pass
+
+
+class MockBattery(PropertiesObject):
+    INTERFACE = "org.kde.kdeconnect.device.battery"
+
+    def __init__(self, bus, device_id: str, drain_ms: int = 0):
+        super().__init__(bus, f"{DEVICE_PATH_PREFIX}/{device_id}/battery", {
+            "charge": dbus.Int32(80),
+            "isCharging": dbus.Boolean(False),
+        })
+        if drain_ms > 0:
+            GLib.timeout_add(drain_ms, self.drain)
+
+    def drain(self):
+        """Lose one percent, or recharge from empty, and announce it like kdeconnectd does"""
+        charge = int(self.props["charge"]) - 1
+        if charge < 0:
+            charge = 100
+        self.props["charge"] = dbus.Int32(charge)
+        self.refreshed(self.props["isCharging"], self.props["charge"])
+        return True
+
+    @dbus.service.signal("org.kde.kdeconnect.device.battery", signature="bi")
+    def refreshed(self, is_charging, charge):
+        pass
+
+
+class MockMprisRemote(PropertiesObject):
+    INTERFACE = "org.kde.kdeconnect.device.mprisremote"
+
+    def __init__(self, bus, device_id: str, players: int):
+        self.player_state = {
+            f"Player{i}": {
+                "title": dbus.String(f"Track {i}" if i == players - 1 else ""),
+                "artist": dbus.String(f"Artist {i}" if i == players - 1 else ""),
+                "album": dbus.String(""),
+                "isPlaying": dbus.Boolean(i == players - 1),
+                "position": dbus.Int32(0),
+                "length": dbus.Int32(180000),
+                "volume": dbus.Int32(50),
+                "playing_since": time.monotonic(),
+            }
+            for i in range(players)
+        }
+        names = list(self.player_state)
+        props = {
+            "playerList": dbus.Array(names, signature="s"),
+            "player": dbus.String(names[0] if names else ""),
+        }
+        super().__init__(bus, f"{DEVICE_PATH_PREFIX}/{device_id}/mprisremote", props)
+        self.on_set("player", props["player"])
+
+    def current(self) -> dict:
+        # position advances in real time while playing, like a real player
+        props = dict(self.props)
+        state = self.player_state.get(str(props["player"]))
+        if state is not None:
+            props["position"] = dbus.Int32(self.position(state))
+        return props
+
+    def position(self, state) -> int:
+        position = int(state["position"])
+        if state["isPlaying"]:
+            position += int((time.monotonic() - state["playing_since"]) * 1000)
+        return min(position, int(state["length"]))
+
+    def on_set(self, name, value):
+        if name == "player":
+            state = self.player_state.get(str(value))
+            if state is None:
+                self.props.update({
+                    "title": dbus.String(""), "artist": dbus.String(""), "album": dbus.String(""),
+                    "isPlaying": dbus.Boolean(False), "position": dbus.Int32(0),
+                    "length": dbus.Int32(0), "volume": dbus.Int32(0),
+                })
+            else:
+                self.props.update({k: v for k, v in state.items() if k != "playing_since"})
+        elif name == "position":
+            # Seek
+            state = self.player_state.get(str(self.props["player"]))
+            if state is not None:
+                state["position"] = dbus.Int32(value)
+                state["playing_since"] = time.monotonic()
+
+    @dbus.service.method("org.kde.kdeconnect.device.mprisremote", in_signature="s", async_callbacks=ASYNC)
+    def sendAction(self, action, reply, error):
+        CALLS["mprisremote.sendAction"] += 1
+        state = self.player_state.get(str(self.props["player"]))
+        if state is not None and action in ("Play", "Pause", "PlayPause", "Stop"):
+            playing = {"Play": True, "Pause": False, "Stop": False,
+                       "PlayPause": not bool(state["isPlaying"])}[action]
+            state["position"] = dbus.Int32(0 if action == "Stop" else self.position(state))
+            state["playing_since"] = time.monotonic()
+            state["isPlaying"] = dbus.Boolean(playing)
+            self.props["isPlaying"] = state["isPlaying"]
+            self.props["position"] = state["position"]
+        self.propertiesChanged()
+        respond(reply)
+
+    @dbus.service.signal("org.kde.kdeconnect.device.mprisremote")
+    def propertiesChanged(self):
+        pass
+
+
+class MockNotification(PropertiesObject):
+    INTERFACE = "org.kde.kdeconnect.device.notifications.notification"
+
+    def __init__(self, bus, device_id: str, notif_id: str, index: int, plugin: "MockNotifications"):
+        self.notif_id = notif_id
+        self.plugin = plugin
+        super().__init__(bus, f"{DEVICE_PATH_PREFIX}/{device_id}/notifications/{notif_id}", {
+            "appName": dbus.String(f"App {index % 5}"),
+            "title": dbus.String(f"Notification {index}"),
+            "text": dbus.String(f"Body of notification {index}"),
+            "ticker": dbus.String(f"App {index % 5}: Notification {index}"),
+            "dismissable": dbus.Boolean(True),
+            "hasIcon": dbus.Boolean(False),
+            "silent": dbus.Boolean(False),
+            "replyId": dbus.String(f"reply-{index}" if index % 2 else ""),
+        })
+
+    @dbus.service.method(INTERFACE, async_callbacks=ASYNC)
+    def dismiss(self, reply, error):
+        CALLS["notification.dismiss"] += 1
+        respond(reply)
+        self.plugin.remove(self.notif_id)
+
+    @dbus.service.method(INTERFACE, in_signature="s", async_callbacks=ASYNC)
+    def sendReply(self, message, reply, error):
+        CALLS["notification.sendReply"] += 1
+        if not self.props["replyId"]:
+            error(dbus.exceptions.DBusException(
+                "Notification does not support replies", name="org.freedesktop.DBus.Error.Failed"
+            ))
+            return
+        respond(reply)
+
+
+class MockNotifications(CountingObject):
+    def __init__(self, bus, device_id: str, count: int, churn_ms: int = 0):
+        super().__init__(bus, f"{DEVICE_PATH_PREFIX}/{device_id}/notifications")
+        self.bus = bus
+        self.device_id = device_id
+        self.notifications = {}
+        self.next_index = 0
+        for _ in range(count):
+            self.post()
+        if churn_ms > 0:
+            GLib.timeout_add(churn_ms, self.churn)
+
+    def post(self) -> str:
+        """Export a new notification object and return its id"""
+        notif_id = f"mock{self.next_index}"
+        self.notifications[notif_id] = MockNotification(self.bus, self.device_id, notif_id, self.next_index, self)
+        self.next_index += 1
+        return notif_id
+
+    def remove(self, notif_id: str):
+        """Unexport a notification and announce it, as after a dismiss on the phone"""
+        notification = self.notifications.pop(notif_id, None)
+        if notification is not None:
+            notification.remove_from_connection()
+            self.notificationRemoved(notif_id)
+
+    def churn(self):
+        """Replace the oldest notification with a new one, as a busy phone would"""
+        if self.notifications:
+            self.remove(next(iter(self.notifications)))
+        self.notificationPosted(self.post())
+        return True
+
+    @dbus.service.method("org.kde.kdeconnect.device.notifications", out_signature="as", async_callbacks=ASYNC)
+    def activeNotifications(self, reply, error):
+        CALLS["notifications.activeNotifications"] += 1
+        respond(reply, dbus.Array(list(self.notifications), signature="s"))
+
+    @dbus.service.signal("org.kde.kdeconnect.device.notifications", signature="s")
+    def notificationPosted(self, notif_id):
+        pass
+
+    @dbus.service.signal("org.kde.kdeconnect.device.notifications", signature="s")
+    def notificationRemoved(self, notif_id):
+        pass
+
+
+class MockActionPlugin(CountingObject):
+    """ping, share and findmyphone plugins - actions only, no state
+
+    While the device is unreachable actions are never answered, so callers
+    wait for their D-Bus timeout.
+    """
+
+    def __init__(self, bus, path: str, device: MockDevice):
+        super().__init__(bus, path)
+        self.device = device
+
+    def answer(self, reply):
+        if self.device.reachable:
+            respond(reply)
+
+    @dbus.service.method("org.kde.kdeconnect.device.ping", in_signature="s", async_callbacks=ASYNC)
+    def sendPing(self, message, reply, error):
+        CALLS["ping.sendPing"] += 1
+        self.answer(reply)
+
+    @dbus.service.method("org.kde.kdeconnect.device.share", in_signature="s", async_callbacks=ASYNC)
+    def shareUrl(self, url, reply, error):
+        CALLS["share.shareUrl"] += 1
+        self.answer(reply)
+
+    @dbus.service.method("org.kde.kdeconnect.device.share", in_signature="as", async_callbacks=ASYNC)
+    def shareUrls(self, urls, reply, error):
+        CALLS["share.shareUrls"] += 1
+        self.answer(reply)
+
+    @dbus.service.method("org.kde.kdeconnect.device.findmyphone", in_signature="", async_callbacks=ASYNC)
+    def ring(self, reply, error):
+        CALLS["findmyphone.ring"] += 1
+        self.answer(reply)
+
+
+class MockDaemon(CountingObject):
+    def __init__(self, bus, device_ids):
+        super().__init__(bus, DAEMON_PATH)
+        self.device_ids = device_ids
+        self.device_objects = {}
+
+    @dbus.service.method("org.kde.kdeconnect.daemon", in_signature="bb", out_signature="as", async_callbacks=ASYNC)
+    def devices(self, only_reachable, only_paired, reply, error):
+        CALLS["daemon.devices"] += 1
+        respond(reply, dbus.Array(self.device_ids, signature="s"))
+
+    @dbus.service.method(MOCK_IFACE, out_signature="a{su}")
+    def CallStats(self):
+        return dbus.Dictionary({k: dbus.UInt32(v) for k, v in CALLS.items()}, signature="su")
+
+    @dbus.service.method(MOCK_IFACE)
+    def ResetStats(self):
+        CALLS.clear()
+
+    @dbus.service.method(MOCK_IFACE, in_signature="sb")
+    def SetReachable(self, device_id, reachable):
+        self.device_objects[str(device_id)].set_reachable(bool(reachable))
+
+
+def build(bus, devices: int, players: int, notifications: int, churn_ms: int = 0, drain_ms: int = 0,
+          offline: int = 0):
+    """Export the mock object tree and return the objects so they stay alive
+
+    The last `offline` devices start unreachable.
+    """
+    device_ids = [f"mockdevice{i:04d}" for i in range(devices)]
+    daemon = MockDaemon(bus, device_ids)
+    objects = [daemon]
+    for index, device_id in enumerate(device_ids):
+        prefix = f"{DEVICE_PATH_PREFIX}/{device_id}"
+        device = daemon.device_objects[device_id] = MockDevice(
+            bus, device_id, index, reachable=index < devices - offline
+        )
+        objects += [
+            device,
+            MockBattery(bus, device_id, drain_ms),
+            MockMprisRemote(bus, device_id, players),
+            MockNotifications(bus, device_id, notifications, churn_ms),
+        ]
+        for plugin in ("ping", "share", "findmyphone"):
+            objects.append(MockActionPlugin(bus, f"{prefix}/{plugin}", device))
+    return objects
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake kdeconnectd for offline benchmarks")
+    parser.add_argument("--devices", type=int, default=1)
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--notifications", type=int, default=40)
+    parser.add_argument("--latency", type=int, default=0, help="Reply delay per call in milliseconds")
+    parser.add_argument("--churn", type=int, default=0,
+                        help="Replace one notification per device every N milliseconds (0 = never)")
+    parser.add_argument("--drain", type=int, default=0,
+                        help="Drop every battery by one percent every N milliseconds (0 = never)")
+    parser.add_argument("--offline", type=int, default=0,
+                        help="Make the last N devices unreachable; their plugin actions never answer")
+    args = parser.parse_args()
+
+    global LATENCY_MS
+    LATENCY_MS = args.latency
+
+    DBusGMainLoop(set_as_default=True)
+    bus = dbus.SessionBus()
+    name = dbus.service.BusName(BUS_NAME, bus)
+    objects = build(bus, args.devices, args.players, args.notifications, args.churn, args.drain, args.offline)
+
+    print("ready", flush=True)
+    GLib.MainLoop().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,93 +1,235 @@
 #!/usr/bin/env python3
-"""Test script for official MCP protocol server"""
+"""Test script for official MCP protocol server
 
+Usage:
+    python3 test_mcp.py [DEVICE_ID]
+    python3 test_mcp.py [DEVICE_ID] --load 1000 --in-flight 16 [--tool get_battery]
+
+Without DEVICE_ID the first device returned by list_devices is used.
+"""
+
+import argparse
+import itertools
 import json
+import os
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import Future
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_server.py")
+
+
+class MCPSession:
+    """One long-lived mcp_server.py subprocess spoken to over stdio
+
+    Requests are written as soon as they are made and a reader thread matches
+    responses to them by id, so any number can be in flight at once.
+    """
+
+    def __init__(self, command=None, env: dict = None, verbose: bool = False):
+        self.verbose = verbose
+        self.proc = subprocess.Popen(
+            command or [sys.executable, SERVER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=env
+        )
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.notifications = []
+        self._reader = threading.Thread(target=self._read_loop, name="mcp-session-reader", daemon=True)
+        self._reader.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_loop(self):
+        for line in self.proc.stdout:
+            message = json.loads(line)
+            if "id" not in message:
+                # Server notification (log message, progress, resource update)
+                self.notifications.append(message)
+                continue
+            with self._lock:
+                future = self._pending.pop(message["id"], None)
+            if future is not None:
+                future.set_result(message)
+
+        # Server exited: fail whatever is still waiting
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError("MCP server exited"))
+
+    def _send(self, message: dict):
+        if self.verbose:
+            print(f"\n>>> MCP Request: {message['method']}")
+            print(f"    {json.dumps(message, ensure_ascii=False)}")
+        with self._write_lock:
+            self.proc.stdin.write(json.dumps(message) + "\n")
+            self.proc.stdin.flush()
+
+    def request(self, method: str, params: dict = None) -> Future:
+        """Send a request without waiting; the future resolves to the raw response"""
+        request_id = next(self._ids)
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+        self._send(message)
+        return future
+
+    def call(self, method: str, params: dict = None, timeout: float = 30):
+        """Send a request and wait for its result"""
+        response = self.request(method, params).result(timeout)
+        if self.verbose:
+            print("<<< MCP Response:")
+            print(f"    {json.dumps(response, indent=2, ensure_ascii=False)}")
+        if "error" in response:
+            raise RuntimeError(f"{method} failed: {response['error']}")
+        return response["result"]
+
+    def notify(self, method: str, params: dict = None):
+        """Send a notification (no id, no response)"""
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        self._send(message)
+
+    def initialize(self) -> dict:
+        result = self.call("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {
+                "name": "test-client",
+                "version": "1.0.0"
+            }
+        })
+        self.notify("notifications/initialized")
+        return result
+
+    def call_tool(self, name: str, arguments: dict = None, timeout: float = 30):
+        """Call a tool and return its decoded result"""
+        result = self.call("tools/call", {"name": name, "arguments": arguments or {}}, timeout)
+        if result.get("isError"):
+            raise RuntimeError(f"{name} failed: {result['content'][0]['text']}")
+        if "structuredContent" in result:
+            return result["structuredContent"]
+        return json.loads(result["content"][0]["text"])
+
+    def load(self, name: str, arguments: dict, requests: int, in_flight: int = 16) -> dict:
+        """Keep `in_flight` tool calls outstanding until `requests` have completed
+
+        Returns throughput and latency percentiles in milliseconds.
+        """
+        latencies = []
+        errors = 0
+        slots = threading.Semaphore(in_flight)
+        done = threading.Event()
+        remaining = [requests]
+
+        def finished(future, sent):
+            nonlocal errors
+            failed = (future.exception() is not None or "error" in future.result()
+                      or future.result()["result"].get("isError"))
+            with self._lock:
+                latencies.append(time.perf_counter() - sent)
+                errors += bool(failed)
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+            slots.release()
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            slots.acquire()
+            sent = time.perf_counter()
+            future = self.request("tools/call", {"name": name, "arguments": arguments})
+            future.add_done_callback(lambda f, sent=sent: finished(f, sent))
+        done.wait()
+        elapsed = time.perf_counter() - start
+
+        ordered = sorted(latencies)
+
+        def percentile(q):
+            return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] * 1000
+
+        return {
+            "requests": requests,
+            "in_flight": in_flight,
+            "errors": errors,
+            "seconds": elapsed,
+            "requests_per_second": requests / elapsed,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99)
+        }
 
-def send_mcp_request(method: str, params: dict = None, request_id: int = 1):
-    """Send MCP protocol request"""
-    request = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": method
-    }
-    if params:
-        request["params"] = params
-
-    request_json = json.dumps(request)
-    print(f"\n>>> MCP Request: {method}")
-    print(f"    {request_json}")
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
 
-    # Send to MCP server
-    proc = subprocess.Popen(
-        ["python3", "/home/aka/discord-bot-sessions/kanri/kdeconnect-mcp-server/mcp_server.py"],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
 
-    stdout, stderr = proc.communicate(input=request_json + "\n", timeout=5)
+def main():
+    parser = argparse.ArgumentParser(description="KDE Connect MCP server protocol test")
+    parser.add_argument("device_id", nargs="?", help="Device to test against (default: first device)")
+    parser.add_argument("--load", type=int, default=0, help="Also run this many pipelined tool calls")
+    parser.add_argument("--in-flight", type=int, default=16, help="Concurrent requests during --load")
+    parser.add_argument("--tool", default="get_battery", help="Tool called during --load")
+    args = parser.parse_args()
 
-    if stderr:
-        print(f"    [stderr]: {stderr.strip()}")
+    print("=" * 70)
+    print("KDE Connect MCP Server - Official Protocol Test")
+    print("=" * 70)
 
-    if stdout:
-        response = json.loads(stdout.strip())
-        print(f"<<< MCP Response:")
-        print(f"    {json.dumps(response, indent=2, ensure_ascii=False)}")
-        return response
+    with MCPSession(verbose=True) as session:
+        # Test 1: Initialize
+        session.initialize()
 
-    return None
+        # Test 2: List tools
+        session.call("tools/list", {})
 
+        # Test 3: Call tool - list devices
+        devices = session.call_tool("list_devices")["devices"]
+        device_id = args.device_id or (devices[0]["id"] if devices else None)
+        if device_id is None:
+            print("No devices found, skipping device tests")
+            return
 
-def main():
-    DEVICE_ID = "ff516277615c48c597002a1155bed4f4"
+        # Test 4: Call tool - get battery
+        session.call_tool("get_battery", {"device_id": device_id})
 
-    print("=" * 70)
-    print("KDE Connect MCP Server - Official Protocol Test")
-    print("=" * 70)
+        # Test 5: Call tool - get now playing
+        session.call_tool("get_now_playing", {"device_id": device_id})
 
-    # Test 1: Initialize
-    send_mcp_request("initialize", {
-        "protocolVersion": "2024-11-05",
-        "capabilities": {},
-        "clientInfo": {
-            "name": "test-client",
-            "version": "1.0.0"
-        }
-    })
-
-    # Test 2: List tools
-    send_mcp_request("tools/list", {})
-
-    # Test 3: Call tool - list devices
-    send_mcp_request("tools/call", {
-        "name": "kdeconnect_list_devices",
-        "arguments": {}
-    }, request_id=3)
-
-    # Test 4: Call tool - get battery
-    send_mcp_request("tools/call", {
-        "name": "kdeconnect_get_battery",
-        "arguments": {"device_id": DEVICE_ID}
-    }, request_id=4)
-
-    # Test 5: Call tool - get now playing
-    send_mcp_request("tools/call", {
-        "name": "kdeconnect_get_now_playing",
-        "arguments": {"device_id": DEVICE_ID}
-    }, request_id=5)
-
-    # Test 6: Call tool - send notification
-    send_mcp_request("tools/call", {
-        "name": "kdeconnect_send_notification",
-        "arguments": {
-            "device_id": DEVICE_ID,
+        # Test 6: Call tool - send notification
+        session.call_tool("send_notification", {
+            "device_id": device_id,
             "message": "✅ Official MCP Protocol Server Test Success!"
-        }
-    }, request_id=6)
+        })
+
+        if args.load:
+            session.verbose = False
+            stats = session.load(args.tool, {"device_id": device_id}, args.load, args.in_flight)
+            print(f"\n{args.load} x {args.tool}, {args.in_flight} in flight: "
+                  f"{stats['requests_per_second']:.1f} req/s, p50 {stats['p50_ms']:.1f} ms, "
+                  f"p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms, {stats['errors']} errors")
 
     print("\n" + "=" * 70)
     print("✅ All official MCP protocol tests completed!")
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""Unit checks that need neither a session bus nor kdeconnectd
+
+Usage:
+    python3 -m pytest test_units.py
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastmcp import Client
+
+from mcp_server import (
+    DEVICE_PATH_PREFIX, DeviceInfo, DeviceScheduler, DeviceStateCache, DeviceUnreachableError,
+    KDEConnectDBus, MediaCommandQueue, NotificationStore, mcp
+)
+
+
+# ========== MediaCommandQueue.coalesce ==========
+
+@pytest.mark.parametrize("actions, expected", [
+    (["Play", "Pause", "Play"], ["Play"]),
+    (["Pause", "Pause"], ["Pause"]),
+    (["PlayPause"], ["PlayPause"]),
+    (["PlayPause", "PlayPause"], []),
+    (["Play", "PlayPause"], ["Pause"]),
+    (["Pause", "PlayPause", "PlayPause", "PlayPause"], ["Play"]),
+    (["Play", "PlayPause", "PlayPause"], ["Play"]),
+    (["Stop", "PlayPause"], ["Stop", "PlayPause"]),
+    (["Play", "Stop"], ["Stop"]),
+    (["Play", "Next", "Pause", "Pause"], ["Play", "Next", "Pause"]),
+    (["Next", "Next", "Previous"], ["Next", "Next", "Previous"]),
+    ([], []),
+])
+def test_coalesce_actions(actions, expected):
+    commands = [("action", action) for action in actions]
+    assert MediaCommandQueue.coalesce(commands) == [("action", action) for action in expected]
+
+
+def test_coalesce_keeps_last_of_adjacent_player_selections():
+    commands = [("player", "A"), ("player", "B"), ("action", "Play"), ("action", "Pause"),
+                ("player", "C"), ("player", "D")]
+    assert MediaCommandQueue.coalesce(commands) == [("player", "B"), ("action", "Pause"), ("player", "D")]
+
+
+def test_coalesce_does_not_merge_across_player_selections():
+    commands = [("action", "Play"), ("player", "A"), ("action", "Play")]
+    assert MediaCommandQueue.coalesce(commands) == commands
+
+
+# ========== DeviceScheduler circuit breaker ==========
+
+def scheduled_phone(scheduler: DeviceScheduler):
+    """A stand-in device API whose calls time out while answering is False"""
+    class Phone:
+        answering = True
+
+        def call(self, device_id: str) -> str:
+            if not self.answering:
+                raise TimeoutError("no reply")
+            return "ok"
+
+        def read(self, device_id: str) -> dict:
+            """Answers an error value instead of raising, like the KDEConnectDBus readers"""
+            try:
+                return {"value": self.call(device_id)}
+            except TimeoutError as e:
+                scheduler.report(device_id, e)
+                return {"error": str(e)}
+
+    scheduler.schedule_class(Phone)
+    return Phone()
+
+
+def breaker(scheduler: DeviceScheduler, device_id: str) -> str:
+    return scheduler.snapshot()["devices"][device_id]["breaker"]
+
+
+def test_breaker_opens_half_opens_and_closes():
+    scheduler = DeviceScheduler(failure_threshold=2, cooldown=0.2)
+    phone = scheduled_phone(scheduler)
+
+    phone.answering = False
+    with pytest.raises(TimeoutError):
+        phone.call("dev")
+    assert breaker(scheduler, "dev") == "closed"
+    with pytest.raises(TimeoutError):
+        phone.call("dev")
+    assert breaker(scheduler, "dev") == "open"
+
+    # Refused without calling the device
+    with pytest.raises(DeviceUnreachableError) as refused:
+        phone.call("dev")
+    assert refused.value.reason == "not_answering"
+    assert 0 < refused.value.retry_in <= 0.2
+
+    time.sleep(0.25)
+    assert breaker(scheduler, "dev") == "half-open"
+    phone.answering = True
+    assert phone.call("dev") == "ok"
+    assert breaker(scheduler, "dev") == "closed"
+    assert phone.call("dev") == "ok"
+
+
+def test_failed_trial_reopens_breaker():
+    scheduler = DeviceScheduler(failure_threshold=1, cooldown=0.2)
+    phone = scheduled_phone(scheduler)
+
+    phone.answering = False
+    with pytest.raises(TimeoutError):
+        phone.call("dev")
+    time.sleep(0.25)
+    assert breaker(scheduler, "dev") == "half-open"
+    with pytest.raises(TimeoutError):
+        phone.call("dev")
+    assert breaker(scheduler, "dev") == "open"
+    with pytest.raises(DeviceUnreachableError):
+        phone.call("dev")
+
+
+def test_breaker_counts_errors_a_reader_returns():
+    scheduler = DeviceScheduler(failure_threshold=2, cooldown=30.0)
+    phone = scheduled_phone(scheduler)
+
+    phone.answering = False
+    assert "error" in phone.read("dev")
+    assert breaker(scheduler, "dev") == "closed"
+    assert "error" in phone.read("dev")
+    assert breaker(scheduler, "dev") == "open"
+    with pytest.raises(DeviceUnreachableError):
+        phone.read("dev")
+
+
+def test_returned_error_does_not_reset_failures():
+    scheduler = DeviceScheduler(failure_threshold=3, cooldown=30.0)
+    phone = scheduled_phone(scheduler)
+
+    phone.answering = False
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            phone.call("dev")
+    assert "error" in phone.read("dev")
+    assert scheduler.snapshot()["devices"]["dev"]["consecutive_failures"] == 3
+    assert breaker(scheduler, "dev") == "open"
+
+
+def test_breaker_is_per_device():
+    scheduler = DeviceScheduler(failure_threshold=1, cooldown=30.0)
+    phone = scheduled_phone(scheduler)
+
+    phone.answering = False
+    with pytest.raises(TimeoutError):
+        phone.call("away")
+    phone.answering = True
+    assert phone.call("home") == "ok"
+    assert breaker(scheduler, "away") == "open"
+    assert breaker(scheduler, "home") == "closed"
+
+
+# ========== DeviceStateCache ==========
+
+class SignalBus:
+    """Keeps the receivers a cache subscribes, so tests can emit signals to them"""
+
+    def __init__(self):
+        self.receivers = []
+
+    def add_signal_receiver(self, handler, signal_name=None, **match):
+        self.receivers.append((signal_name, handler, match))
+
+    def emit(self, signal_name: str, *args, path: str = None):
+        for name, handler, match in self.receivers:
+            if name == signal_name:
+                handler(*args, **({"path": path} if "path_keyword" in match else {}))
+
+
+def wait_for(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_connect_during_first_resync_leaves_gate_on():
+    class Daemon:
+        """Connects on its first call, as LazyKDEConnectDBus does, which starts the cache"""
+        bus = SignalBus()
+        connected = False
+
+        def list_devices(self, reachable_only=True, paired_only=True):
+            if not self.connected:
+                self.connected = True
+                cache.start(threading.current_thread())
+            return ["home", "away"]
+
+        def get_device_info(self, device_id):
+            # Slow enough that the background seed queues up behind this fetch
+            time.sleep(0.05)
+            return DeviceInfo(id=device_id, name=device_id, type="smartphone",
+                              is_paired=True, is_reachable=device_id == "home")
+
+    cache = DeviceStateCache(Daemon())
+    assert [d["id"] for d in cache.devices()] == ["home"]
+    wait_for(lambda: not cache._background)
+    assert cache.reachable("home") is True
+    assert cache.reachable("away") is False
+
+
+def test_first_resync_connects_before_it_reads_the_epoch():
+    class Daemon:
+        """Connects on first attribute access, as LazyKDEConnectDBus does"""
+        connected = False
+
+        @property
+        def bus(self):
+            if not self.connected:
+                self.connected = True
+                cache.start(threading.current_thread())
+            return signal_bus
+
+        def list_devices(self, reachable_only=True, paired_only=True):
+            return ["home", "away"]
+
+        def get_device_info(self, device_id):
+            return DeviceInfo(id=device_id, name=device_id, type="smartphone",
+                              is_paired=True, is_reachable=device_id == "home")
+
+    signal_bus = SignalBus()
+    cache = DeviceStateCache(Daemon())
+    cache.devices()
+    # Gated straight away, without waiting for the background seed
+    assert cache.reachable("away") is False
+    wait_for(lambda: not cache._background)
+    assert cache.reachable("away") is False
+
+
+# ========== batch ==========
+
+def test_batch_runs_calls_through_a_client():
+    async def call_batch(calls):
+        async with Client(mcp) as client:
+            return (await client.call_tool("batch", {"calls": calls})).structured_content
+
+    result = asyncio.run(call_batch([
+        {"tool": "list_transfers"},
+        {"tool": "no_such_tool"},
+        {"tool": "batch", "arguments": {"calls": []}},
+    ]))
+    assert result["results"][0] == {"tool": "list_transfers", "result": {"transfers": [], "count": 0}}
+    assert "no_such_tool" in result["results"][1]["error"]
+    assert result["results"][2]["error"] == "batch cannot be nested"
+    assert (result["count"], result["failed"]) == (3, 2)
+
+
+# ========== NotificationStore ==========
+
+NOTIFICATIONS_PATH = f"{DEVICE_PATH_PREFIX}/phone/notifications"
+
+
+class NotificationPhone:
+    """A stand-in KDEConnectDBus for one device's notifications plugin"""
+
+    def __init__(self, *notif_ids: str):
+        self.bus = SignalBus()
+        self.proxies = self
+        self.active = {notif_id: self.props(notif_id) for notif_id in notif_ids}
+        # Called in the middle of a full read, after the notifications were listed
+        self.during_read = None
+
+    @staticmethod
+    def props(notif_id: str) -> dict:
+        return {"appName": "App", "title": notif_id, "text": "", "ticker": "", "dismissable": True,
+                "hasIcon": False, "silent": False, "replyId": "", "iconPath": ""}
+
+    def get_notifications(self, device_id: str):
+        listed = [KDEConnectDBus._notification(notif_id, props) for notif_id, props in self.active.items()]
+        if self.during_read:
+            self.during_read()
+        return listed
+
+    def interface(self, path: str, interface: str):
+        props = self.active.get(path.rsplit("/", 1)[-1])
+
+        class Properties:
+            def GetAll(self, interface, reply_handler, error_handler):
+                if props is None:
+                    error_handler(KeyError(path))
+                else:
+                    reply_handler(props)
+        return Properties()
+
+    def post(self, notif_id: str):
+        self.active[notif_id] = self.props(notif_id)
+        self.bus.emit("notificationPosted", notif_id, path=NOTIFICATIONS_PATH)
+
+    def remove(self, notif_id: str):
+        del self.active[notif_id]
+        self.bus.emit("notificationRemoved", notif_id, path=NOTIFICATIONS_PATH)
+
+    def remove_all(self):
+        self.active.clear()
+        self.bus.emit("allNotificationsRemoved", path=NOTIFICATIONS_PATH)
+
+
+def notification_store(*notif_ids: str, max_tombstones: int = 1000):
+    phone = NotificationPhone(*notif_ids)
+    store = NotificationStore(phone, max_tombstones=max_tombstones)
+    store.start(threading.current_thread())
+    return phone, store
+
+
+def ids(notifications) -> list:
+    return [n["id"] for n in notifications]
+
+
+def test_notifications_since_cursor():
+    phone, store = notification_store("n0", "n1")
+    first = store.query("phone")
+    assert (ids(first["notifications"]), first["full"]) == (["n0", "n1"], True)
+
+    phone.post("n2")
+    phone.remove("n0")
+    delta = store.query("phone", since=first["cursor"])
+    assert (ids(delta["notifications"]), delta["removed"], delta["full"]) == (["n2"], ["n0"], False)
+
+    unchanged = store.query("phone", since=delta["cursor"])
+    assert (unchanged["notifications"], unchanged["removed"]) == ([], [])
+    assert unchanged["cursor"] == delta["cursor"]
+
+
+def test_reposted_notification_replaces_its_tombstone():
+    phone, store = notification_store("n0", "n1")
+    cursor = store.query("phone")["cursor"]
+
+    phone.remove("n0")
+    phone.post("n0")
+    delta = store.query("phone", since=cursor)
+    assert (ids(delta["notifications"]), delta["removed"]) == (["n0"], [])
+    assert ids(store.notifications("phone")) == ["n1", "n0"]
+
+
+def test_all_removed_leaves_a_tombstone_per_notification():
+    phone, store = notification_store("n0", "n1")
+    cursor = store.query("phone")["cursor"]
+
+    phone.remove_all()
+    delta = store.query("phone", since=cursor)
+    assert (delta["notifications"], sorted(delta["removed"])) == ([], ["n0", "n1"])
+
+
+def test_cursor_older_than_trimmed_tombstones_gets_full_listing():
+    phone, store = notification_store("n0", "n1", "n2", "n3", max_tombstones=2)
+    cursor = store.query("phone")["cursor"]
+
+    phone.remove("n0")
+    after_first = store.query("phone")["cursor"]
+    phone.remove("n1")
+    phone.remove("n2")
+    # n0's tombstone is gone, so a cursor from before its removal cannot be answered with a delta
+    expired = store.query("phone", since=cursor)
+    assert (ids(expired["notifications"]), expired["removed"], expired["full"]) == (["n3"], [], True)
+    delta = store.query("phone", since=after_first)
+    assert (delta["removed"], delta["full"]) == (["n1", "n2"], False)
+
+
+def test_signals_during_full_read_are_applied_to_its_result():
+    phone, store = notification_store("n0", "n1")
+    phone.during_read = lambda: (phone.remove("n1"), phone.post("n2"))
+
+    assert ids(store.notifications("phone")) == ["n0", "n2"]
+
+
+def test_signals_for_unread_devices_are_ignored():
+    phone, store = notification_store("n0")
+    phone.post("n1")
+    phone.remove("n0")
+    assert ids(store.notifications("phone")) == ["n1"]